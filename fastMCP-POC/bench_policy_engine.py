@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List
+
+from eunomia.config import settings
+from eunomia.engine.engine import PolicyEngine
+from eunomia_core import schemas
+
+from policy_engine import CompiledPolicyEngine
+
+ROLES = ("admin", "editor", "viewer", "guest")
+
+
+def build_synthetic_policy(rule_count: int, tool_count: int) -> dict:
+    """
+    Builds a policy in the `mcp_policies*.json` schema: one unrestricted
+    listing rule followed by role- and user-scoped execute rules, each
+    pinned to a tool name like the rules in `mcp_policies2.json`.
+    """
+    rules = [{
+        "name": "unrestricted-listing",
+        "description": "Allow any user to view any tools",
+        "effect": "allow",
+        "principal_conditions": [],
+        "resource_conditions": [],
+        "actions": ["list"],
+    }]
+    for i in range(rule_count - 1):
+        tool = f"tool_{i % tool_count}"
+        if i % 2 == 0:
+            principal_condition = {"path": "attributes.permissions.role", "operator": "equals", "value": ROLES[i % len(ROLES)]}
+        else:
+            principal_condition = {"path": "uri", "operator": "equals", "value": f"user:{i % 50}"}
+        rules.append({
+            "name": f"rule-{i}",
+            "description": f"Synthetic rule {i}",
+            "effect": "deny" if i % 7 == 0 else "allow",
+            "principal_conditions": [principal_condition],
+            "resource_conditions": [{"path": "attributes.name", "operator": "equals", "value": tool}],
+            "actions": ["execute"],
+        })
+    return {
+        "version": "1.0",
+        "name": "synthetic-policy",
+        "description": "Synthetic workload for the policy benchmark",
+        "default_effect": "deny",
+        "rules": rules,
+    }
+
+
+def build_workload(count: int, tool_count: int, seed: int) -> List[schemas.CheckRequest]:
+    """Builds check requests shaped like the ones EunomiaMcpMiddleware sends."""
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        tool = f"tool_{rng.randrange(tool_count)}"
+        action = "list" if rng.random() < 0.3 else "execute"
+        method = "tools/list" if action == "list" else "tools/call"
+        principal = schemas.PrincipalCheck(
+            uri=f"user:{rng.randrange(60)}",
+            attributes={"user_agent": "bench", "permissions": {"role": rng.choice(ROLES)}},
+        )
+        resource = schemas.ResourceCheck(
+            uri=f"mcp:tools:{tool}",
+            attributes={"method": method, "component_type": "tools", "name": tool, "uri": f"mcp:tools:{tool}"},
+        )
+        requests.append(schemas.CheckRequest(principal=principal, resource=resource, action=action))
+    return requests
+
+
+def time_per_decision(decide, requests: List[schemas.CheckRequest]) -> float:
+    start = time.perf_counter()
+    for request in requests:
+        decide(request)
+    return (time.perf_counter() - start) / len(requests)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark policy decisions: Eunomia engine vs compiled engine.")
+    parser.add_argument("--rules", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--tools", type=int, default=40, help="Distinct tool names referenced by rules.")
+    parser.add_argument("--requests", type=int, default=5000, help="Decisions replayed per rule count.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Same settings create_eunomia_middleware applies for a local policy file.
+    settings.ENGINE_SQL_DATABASE = False
+    settings.FETCHERS = {}
+
+    workload = build_workload(args.requests, args.tools, args.seed)
+    print(f"{'rules':>6} | {'eunomia µs/decision':>20} | {'compiled cold':>14} | {'compiled warm':>14}")
+    for rule_count in args.rules:
+        policy = schemas.Policy.model_validate_json(json.dumps(build_synthetic_policy(rule_count, args.tools)))
+
+        baseline = PolicyEngine()
+        baseline.add_policy(policy)
+
+        compiled = CompiledPolicyEngine([policy])
+        # Both engines must agree before their timings mean anything.
+        for request in workload:
+            expected = baseline.evaluate_all(request)
+            actual = await compiled.check(request)
+            assert (expected.allowed, expected.reason) == (actual.allowed, actual.reason), request
+
+        before = time_per_decision(baseline.evaluate_all, workload)
+        cold = time_per_decision(CompiledPolicyEngine([policy], memo_size=0).evaluate, workload)
+        warm = time_per_decision(compiled.evaluate, workload)
+        print(f"{rule_count:>6} | {before * 1e6:>20.2f} | {cold * 1e6:>14.2f} | {warm * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
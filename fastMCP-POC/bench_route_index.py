@@ -0,0 +1,114 @@
+import argparse
+import random
+import time
+from typing import Any, Dict, List, Tuple
+
+from route_index import SecurityRouteIndex
+
+
+def build_synthetic_spec(path_count: int) -> Dict[str, Any]:
+    """
+    Builds an OpenAPI-shaped spec with `path_count` path templates, mixing
+    literal and `{param}` segments the way a generated REST API would.
+    """
+    paths: Dict[str, Any] = {}
+    resources_per_group = 50
+    for i in range(path_count):
+        group = f"group{i // resources_per_group}"
+        resource = f"resource{i % resources_per_group}"
+        if i % 3 == 0:
+            template = f"/api/{group}/{resource}"
+        elif i % 3 == 1:
+            template = f"/api/{group}/{resource}/{{item_id}}"
+        else:
+            template = f"/api/{group}/{resource}/{{item_id}}/details"
+        paths[template] = {
+            "get": {"security": [{"ApiKeyAuth": []}]},
+            "post": {"security": [{"BearerAuth": []}]},
+        }
+    return {
+        "paths": paths,
+        "security": [{"ApiKeyAuth": []}],
+        "components": {
+            "securitySchemes": {
+                "ApiKeyAuth": {"type": "apiKey", "in": "header", "name": "X-API-Key"},
+                "BearerAuth": {"type": "http", "scheme": "bearer"},
+            }
+        },
+    }
+
+
+def linear_scan_lookup(spec: Dict[str, Any], method: str, path: str) -> list:
+    """
+    The pre-index lookup from `DynamicOASAuth`, minus its logging: re-split
+    every path template on every request until one matches.
+    """
+    request_path_segments = path.strip("/").split("/")
+    for spec_path, path_item in spec.get("paths", {}).items():
+        spec_path_segments = spec_path.strip("/").split("/")
+        if len(request_path_segments) != len(spec_path_segments):
+            continue
+        is_match = True
+        for req_seg, spec_seg in zip(request_path_segments, spec_path_segments):
+            if spec_seg.startswith("{") and spec_seg.endswith("}"):
+                continue
+            if req_seg != spec_seg:
+                is_match = False
+                break
+        if is_match:
+            operation = path_item.get(method.lower())
+            if operation and "security" in operation:
+                return operation["security"]
+            break
+    return spec.get("security", [])
+
+
+def sample_requests(spec: Dict[str, Any], count: int, seed: int) -> List[Tuple[str, str]]:
+    """Picks concrete request paths for random templates in the spec."""
+    rng = random.Random(seed)
+    templates = list(spec["paths"].keys())
+    requests = []
+    for _ in range(count):
+        template = rng.choice(templates)
+        method = rng.choice(("GET", "POST"))
+        requests.append((method, template.replace("{item_id}", str(rng.randint(1, 10_000)))))
+    return requests
+
+
+def time_per_lookup(lookup, requests: List[Tuple[str, str]]) -> float:
+    start = time.perf_counter()
+    for method, path in requests:
+        lookup(method, path)
+    return (time.perf_counter() - start) / len(requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark security requirement lookups.")
+    parser.add_argument("--paths", type=int, default=5000, help="Number of path templates in the synthetic spec.")
+    parser.add_argument("--requests", type=int, default=2000, help="Number of lookups to time.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    spec = build_synthetic_spec(args.paths)
+    requests = sample_requests(spec, args.requests, args.seed)
+
+    build_start = time.perf_counter()
+    index = SecurityRouteIndex(spec)
+    build_seconds = time.perf_counter() - build_start
+
+    # Both strategies must agree before their timings mean anything.
+    for method, path in requests:
+        assert index.security_for(method, path) == linear_scan_lookup(spec, method, path), (method, path)
+
+    before = time_per_lookup(lambda m, p: linear_scan_lookup(spec, m, p), requests)
+    after = time_per_lookup(index.security_for, requests)
+
+    print(f"Synthetic spec: {args.paths} paths, {args.requests} lookups")
+    print(f"Index build (once, at construction): {build_seconds * 1e3:.2f} ms")
+    print(f"Before (linear scan): {before * 1e6:10.2f} µs/request")
+    print(f"After  (route trie):  {after * 1e6:10.2f} µs/request")
+    print(f"Speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
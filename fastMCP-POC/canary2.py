@@ -1,38 +1,76 @@
 import os
 import argparse
-import httpx
-import logging
+import asyncio
+import time
+from typing import Optional
 from dotenv import load_dotenv
-import pprint
 
 # --- FastMCP & Auth Imports ---
 from fastmcp import FastMCP
+from fastmcp.server.openapi import OpenAPITool
 from fastmcp.server.middleware import Middleware, MiddlewareContext, CallNext
 from fastmcp.server.dependencies import get_http_request
-from spec import fetch_spec_from_url
+from spec import SpecLoader
+from gateway_manifest import load_manifest, load_specs
+from downstream_transport import all_transport_stats, create_downstream_client
 # from canary_oauth_proxy_provider import auth_provider  
 from canary_oauth_proxy_provider import auth_provider              # For INCOMING requests from users
 from canary2_dynamic_auth import DynamicOASAuth                 # For OUTGOING requests to the downstream API
-from eunomia_mcp import create_eunomia_middleware     # Official factory function
+from policy_store import create_policy_store_middleware  # Eunomia middleware + hot-reloadable compiled policies
 from eunomia_core import schemas                      # For type hinting
 from starlette.requests import Request   
-
-# --- 1. Configure Logging ---
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger("eunomia_mcp")
+from gateway_logging import configure_logging, get_logger
+from principal_cache import PrincipalCache
+from starlette.responses import JSONResponse
+from mcp.types import ToolAnnotations
 
 # Load environment variables from .env file
 load_dotenv()
 
+# --- 1. Configure Logging ---
+# GATEWAY_DEBUG / GATEWAY_LOG_QUEUE (environment or .env) select debug output and the non-blocking queue handler.
+configure_logging()
+logger = get_logger("principal")
+
 # --- 2. Define the Custom Principal Extraction Logic as a Standalone Function ---
+# One agent session reuses the same token for hundreds of calls, so the parsed
+# principal is cached per token (bounded by PRINCIPAL_CACHE_TTL and the token's exp).
+principal_cache = PrincipalCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", "300")),
+)
+
+
+def _build_user_principal(user_id: str, scopes: list, user_agent: str) -> schemas.PrincipalCheck:
+    """
+    Builds the principal for an authenticated user from their token scopes.
+    """
+    # The permissions are in the 'scopes' list, formatted as 'key:value'.
+    # Parse the scopes list back into a permissions dictionary.
+    permissions = {}
+    for scope in scopes:
+        if ":" in scope:
+            key, value = scope.split(":", 1)
+            permissions[key] = value
+
+    principal_to_check = schemas.PrincipalCheck(
+        uri=f"user:{user_id}",
+        attributes={
+            "user_agent": user_agent,
+            "permissions": permissions
+        }
+    )
+    logger.debug("Built principal: %r", principal_to_check)
+    return principal_to_check
+
+
 def custom_extract_principal() -> schemas.PrincipalCheck:
     """
     This function will replace the default principal extraction logic in Eunomia.
-    It reads the scopes from the validated user object and constructs the principal.
+    It reads the scopes from the validated user object and constructs the principal,
+    reusing a cached principal when the same bearer token is seen again.
     """
     user_agent = "unknown"
-    user_id = None
-    permissions = {}
 
     try:
         request: Request = get_http_request()
@@ -40,95 +78,195 @@ def custom_extract_principal() -> schemas.PrincipalCheck:
 
         # The BearerAuthProvider places the validated user object in request.scope["user"].
         if authenticated_user := request.scope.get("user"):
-            # --- FINAL CORRECTED LOGIC ---
             # The user ID is stored in the 'username' attribute.
             user_id = getattr(authenticated_user, 'username', None)
-            
-            # The permissions are in the 'scopes' list, formatted as 'key:value'.
             scopes = getattr(authenticated_user, 'scopes', [])
-            
-            # Parse the scopes list back into a permissions dictionary.
-            for scope in scopes:
-                if ":" in scope:
-                    key, value = scope.split(":", 1)
-                    permissions[key] = value
+
+            if user_id:
+                access_token = getattr(authenticated_user, 'access_token', None)
+                token = getattr(access_token, 'token', None)
+                if not token:
+                    return _build_user_principal(user_id, scopes, user_agent)
+
+                # The user agent is part of the principal, so it is part of the key too.
+                return principal_cache.get_or_build(
+                    PrincipalCache.token_key(token, user_agent),
+                    getattr(access_token, 'expires_at', None),
+                    lambda: _build_user_principal(user_id, scopes, user_agent),
+                )
 
     except RuntimeError:
         # This can happen if called outside of an HTTP request context.
         pass
     except Exception as e:
-        print(f"DEBUG: An error occurred during principal extraction: {e}")
-
-    # --- Construct the principal based on the extracted data ---
-    if user_id:
-        principal_to_check = schemas.PrincipalCheck(
-            uri=f"user:{user_id}",
-            attributes={
-                "user_agent": user_agent,
-                "permissions": permissions
-            }
-        )
-        print(f"DEBUG: Extracted principal: {principal_to_check.model_dump_json(indent=2)}")
-        return principal_to_check
-    
+        logger.warning("An error occurred during principal extraction: %s", e)
+
     # Default to anonymous if no user ID was found
     principal_to_check = schemas.PrincipalCheck(
         uri="anonymous",
         attributes={"user_agent": user_agent}
     )
-    print(f"DEBUG: Extracted principal (ANONYMOUS): {principal_to_check.model_dump_json(indent=2)}")
+    logger.debug("Extracted principal (ANONYMOUS): %r", principal_to_check)
     return principal_to_check
 
 
-def run_server(url: str):
+def annotate_read_only_tools(route, component):
     """
-    Configures and runs a production-ready, secure FastMCP server.
+    Marks tools for GET/HEAD operations with readOnlyHint, so clients know
+    which results they can safely cache.
     """
-    try:
-        # --- 3. Fetch Spec ---
-        print(f"Fetching OpenAPI spec from: {url}")
-        spec = fetch_spec_from_url(url)
-        base_url = spec.get("servers", [{}])[0].get("url")
-        if not base_url:
-            raise ValueError("Could not find a server URL in the spec.")
+    # Resources have annotations too, but of a different type (mcp.types.Annotations).
+    if isinstance(component, OpenAPITool) and route.method.upper() in ("GET", "HEAD"):
+        existing = component.annotations.model_dump(exclude_none=True) if component.annotations else {}
+        component.annotations = ToolAnnotations(**{"readOnlyHint": True, **existing})
 
-        # --- 4. Configure and Prime Outgoing Request Authentication ---
-        dynamic_auth_handler = DynamicOASAuth(spec=spec)
-        dynamic_auth_handler.prime_credentials()
 
-        client = httpx.AsyncClient(base_url=base_url, auth=dynamic_auth_handler)
-        
-        # --- 5. Instantiate the FastMCP Server ---
-        mcp_instance = FastMCP.from_openapi(
-            openapi_spec=spec,
-            client=client,
-            name=f"MCP Instance for {base_url}",
-            auth=auth_provider
-        )
+def create_openapi_server(spec: dict, name: Optional[str] = None, auth=None) -> FastMCP:
+    """
+    Builds a FastMCP server for one downstream API, with its own pooled
+    AsyncClient and spec-driven DynamicOASAuth for outgoing requests.
+    """
+    base_url = spec.get("servers", [{}])[0].get("url")
+    if not base_url:
+        raise ValueError("Could not find a server URL in the spec.")
 
-        # --- 6. Create and Customize the Eunomia Middleware ---
+    # --- Configure and Prime Outgoing Request Authentication ---
+    dynamic_auth_handler = DynamicOASAuth(spec=spec)
+    dynamic_auth_handler.prime_credentials()
+
+    # Pool limits, timeouts and retries come from the DOWNSTREAM_* settings.
+    client = create_downstream_client(base_url, auth=dynamic_auth_handler, name=name or base_url)
+
+    return FastMCP.from_openapi(
+        openapi_spec=spec,
+        client=client,
+        name=name or f"MCP Instance for {base_url}",
+        auth=auth,
+        mcp_component_fn=annotate_read_only_tools,
+    )
+
+
+def apply_gateway_middleware(mcp_instance: FastMCP):
+    """
+    Creates the customized Eunomia middleware and the gateway's metrics routes.
+    """
+    # Off by default: the bundled mcp_policies.json denies every tool call.
+    policy_store = None
+    if os.getenv("POLICY_ENFORCEMENT", "false").lower() in ("1", "true", "yes", "on"):
         print("🛡️  Applying custom Eunomia middleware...")
-        
-        # First, create the standard middleware instance using the factory.
-        eunomia_middleware = create_eunomia_middleware(policy_file="mcp_policies.json")
+
+        # First, create the standard middleware instance, with its per-request rule
+        # scan replaced by a compiled policy store. With POLICY_HOT_RELOAD on (the
+        # default), edits to the policy file are picked up without a restart.
+        eunomia_middleware, policy_store = create_policy_store_middleware(
+            "mcp_policies.json",
+            watch=os.getenv("POLICY_HOT_RELOAD", "true").lower() in ("1", "true", "yes", "on"),
+        )
 
         # Then, "monkey-patch" its internal method with our custom function.
         # This is the correct way to override the logic given the library's design.
         eunomia_middleware._extract_principal = custom_extract_principal
         print("✅ Custom principal extraction logic has been applied to the middleware.")
 
-        # mcp_instance.add_middleware(eunomia_middleware)
+        mcp_instance.add_middleware(eunomia_middleware)
+    else:
+        print("⚠️  POLICY_ENFORCEMENT is off: no Eunomia middleware, tool calls are not policy-checked.")
+
+    @mcp_instance.custom_route("/metrics/principal-cache", methods=["GET"])
+    async def principal_cache_metrics(request: Request) -> JSONResponse:
+        # Hit/miss counters, to confirm token reuse is actually being served from cache.
+        return JSONResponse(principal_cache.stats())
+
+    @mcp_instance.custom_route("/metrics/policy-engine", methods=["GET"])
+    async def policy_engine_metrics(request: Request) -> JSONResponse:
+        # Includes the serving policy generation, also stamped on each decision's reason.
+        if policy_store is None:
+            return JSONResponse({"enforced": False})
+        return JSONResponse({"enforced": True, **policy_store.stats()})
+
+    @mcp_instance.custom_route("/metrics/downstream", methods=["GET"])
+    async def downstream_metrics(request: Request) -> JSONResponse:
+        # Pool saturation, queue wait and retry counters per downstream API.
+        return JSONResponse(all_transport_stats())
+
+
+def run_server(url: str, port: int = 8001):
+    """
+    Configures and runs a production-ready, secure FastMCP server.
+    """
+    try:
+        # --- 3. Fetch Spec ---
+        # Served from the local spec cache when possible, revalidated in the background.
+        print(f"Loading OpenAPI spec from: {url}")
+        spec = SpecLoader().load_blocking(url)
+
+        # --- 4 & 5. Configure Outgoing Auth and Instantiate the FastMCP Server ---
+        mcp_instance = create_openapi_server(spec, auth=auth_provider)
+
+        # --- 6. Create and Customize the Eunomia Middleware ---
+        apply_gateway_middleware(mcp_instance)
         
         # --- 7. Run the Server ---
-        port = 8001
         print(f"\n🚀 Starting secure, production-ready MCP server on http://127.0.0.1:{port}")
         mcp_instance.run(transport="streamable-http", port=port, stateless_http=True)
 
     except Exception as e:
         print(f"❌ Error: {e}")
 
+
+def run_multi_server(manifest_path: str, port: int = 8001):
+    """
+    Serves every downstream API listed in a manifest from one FastMCP process.
+    Each API is mounted as a sub-server whose tools are prefixed with its
+    manifest name, and specs are loaded concurrently at startup.
+    """
+    try:
+        apis = load_manifest(manifest_path)
+        print(f"Loading {len(apis)} OpenAPI specs from manifest: {manifest_path}")
+        boot_start = time.perf_counter()
+        loaded = asyncio.run(load_specs(apis))
+
+        gateway = FastMCP(name="Multi-API MCP Gateway", auth=auth_provider)
+        report = []
+        for result in loaded:
+            if result.error:
+                report.append((result.api.name, result.seconds, None, result.error))
+                continue
+            sub_server = create_openapi_server(result.spec, name=result.api.name)
+            gateway.mount(sub_server, prefix=result.api.name)
+            tool_count = len(asyncio.run(sub_server.get_tools()))
+            report.append((result.api.name, result.seconds, tool_count, None))
+
+        print("\n--- Downstream APIs ---")
+        for name, seconds, tool_count, error in report:
+            if error:
+                print(f"   ❌ {name}: failed after {seconds * 1000:.0f} ms: {error}")
+            else:
+                print(f"   ✅ {name}: spec loaded in {seconds * 1000:.0f} ms, {tool_count} tools")
+        print(f"   Boot took {time.perf_counter() - boot_start:.2f} s")
+        print("-----------------------\n")
+        if all(error for *_, error in report):
+            raise ValueError("No downstream API could be loaded.")
+
+        apply_gateway_middleware(gateway)
+
+        print(f"\n🚀 Starting secure, production-ready MCP gateway on http://127.0.0.1:{port}")
+        gateway.run(transport="streamable-http", port=port, stateless_http=True)
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run a secure FastMCP server.")
-    parser.add_argument("--url", required=True, help="URL of the OpenAPI 3.1 specification to serve.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--url", help="URL of the OpenAPI 3.1 specification to serve.")
+    source.add_argument("--manifest", help="JSON manifest of downstream APIs to serve from one process.")
+    parser.add_argument("--port", type=int, default=8001, help="Port to serve on.")
+    parser.add_argument("--debug", action="store_true", help="Log per-request auth and principal details (secrets redacted).")
     args = parser.parse_args()
-    run_server(args.url)
+    if args.debug:
+        configure_logging(debug=True)
+    if args.manifest:
+        run_multi_server(args.manifest, args.port)
+    else:
+        run_server(args.url, args.port)
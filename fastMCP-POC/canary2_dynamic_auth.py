@@ -1,8 +1,15 @@
 import httpx
 import os
 import getpass # For securely prompting for credentials
-from typing import Generator, Dict, Any
-import pprint # For pretty printing
+from typing import Generator, Dict, Any, Optional, Tuple
+import logging
+from route_index import SecurityRouteIndex
+from gateway_logging import add_sensitive_headers, get_logger
+
+logger = get_logger("auth")
+
+# A compiled auth plan: the exact header name/value pairs to set on a request.
+AuthPlan = Tuple[Tuple[str, str], ...]
 
 class DynamicOASAuth(httpx.Auth):
     """
@@ -20,6 +27,15 @@ class DynamicOASAuth(httpx.Auth):
         self._spec = spec
         self._security_schemes = spec.get("components", {}).get("securitySchemes", {})
         self._credential_cache: Dict[str, str] = {} # In-memory cache for credentials
+        # Compile the spec's paths once so per-request lookups don't rescan every template.
+        self._route_index = SecurityRouteIndex(spec)
+        # Pre-rendered headers per (METHOD, path_template); the None key holds the global fallback.
+        self._auth_plans: Dict[Optional[Tuple[str, str]], AuthPlan] = {}
+        # Header-borne credentials from the spec must never show up in logs.
+        add_sensitive_headers(
+            details.get("name") for details in self._security_schemes.values()
+            if details.get("type") == "apiKey" and details.get("in") == "header"
+        )
         print("✅ DynamicOASAuth initialized. Will apply auth based on the OpenAPI spec.")
 
     def prime_credentials(self):
@@ -34,8 +50,20 @@ class DynamicOASAuth(httpx.Auth):
 
         for scheme_name in self._security_schemes.keys():
             self._get_credential_for_scheme(scheme_name)
+        self._compile_auth_plans()
         print("-----------------------------------------------------\n")
 
+    def set_credential(self, scheme_name: str, credential: str):
+        """
+        Caches a credential for a scheme. Compiled auth plans are only
+        invalidated when the stored value actually changes.
+        """
+        if self._credential_cache.get(scheme_name) == credential:
+            return
+        self._credential_cache[scheme_name] = credential
+        # Swap rather than clear, so a concurrent lookup never sees a half-emptied table.
+        self._auth_plans = {}
+
     def _get_credential_for_scheme(self, scheme_name: str) -> str:
         """
         Retrieves a credential from the cache or prompts the user for it
@@ -59,79 +87,21 @@ class DynamicOASAuth(httpx.Auth):
         print(f"\n🔒 Secure credential required.")
         credential = getpass.getpass(f"   {prompt_message}: ")
         
-        self._credential_cache[scheme_name] = credential
+        self.set_credential(scheme_name, credential)
         print(f"   ✅ Credential for '{scheme_name}' cached for this session.")
         return credential
 
-    def _get_security_requirements_for_request(self, request: httpx.Request) -> list:
+    def _render_auth_plan(self, security_requirements: list) -> AuthPlan:
         """
-        Finds the security requirements for a given request path and method
-        by robustly matching the request URL against the spec's path templates.
+        Resolves scheme names, scheme types and cached credentials for a list
+        of security requirements into the headers they produce. Later
+        requirements win when two of them target the same header.
         """
-        # --- ADDED LOGGING ---
-        print("\n" + "="*20 + " DEBUG: Finding Security Requirements " + "="*20)
-        print(f"-> Searching for path matching: {request.url.path}")
-        # --- END LOGGING ---
-        
-        request_path_segments = str(request.url.path).strip("/").split("/")
-
-        for spec_path, path_item in self._spec.get("paths", {}).items():
-            spec_path_segments = spec_path.strip("/").split("/")
-
-            if len(request_path_segments) != len(spec_path_segments):
-                continue
-
-            is_match = True
-            for req_seg, spec_seg in zip(request_path_segments, spec_path_segments):
-                if spec_seg.startswith("{") and spec_seg.endswith("}"):
-                    continue
-                if req_seg != spec_seg:
-                    is_match = False
-                    break
-            
-            if is_match:
-                # --- ADDED LOGGING ---
-                print(f"-> SUCCESS: Matched request path to spec path: '{spec_path}'")
-                # --- END LOGGING ---
-                operation = path_item.get(request.method.lower())
-                if operation and "security" in operation:
-                    # --- ADDED LOGGING ---
-                    print(f"-> Found operation-specific security requirements:")
-                    pprint.pprint(operation["security"])
-                    print("="*70 + "\n")
-                    # --- END LOGGING ---
-                    return operation["security"]
-                break
-        
-        # --- ADDED LOGGING ---
-        global_security = self._spec.get("security", [])
-        print(f"-> No operation-specific security found. Falling back to global security requirements:")
-        pprint.pprint(global_security)
-        print("="*70 + "\n")
-        # --- END LOGGING ---
-        return global_security
-
-    def auth_flow(self, request: httpx.Request) -> Generator[httpx.Request, httpx.Response, None]:
-        """
-        The main authentication flow. It finds all required security schemes,
-        retrieves the credentials from the cache, and attaches them to the request.
-        """
-        # --- FIX: Clean the incoming Authorization header ---
-        # The original request from the user to the MCP server has its own auth.
-        # We must remove it to avoid sending conflicting credentials to the downstream API.
-        if "Authorization" in request.headers:
-            print("DEBUG: Removing original Authorization header from user request.")
-            del request.headers["Authorization"]
-        # --- END FIX ---
-
-        security_requirements = self._get_security_requirements_for_request(request)
-        if not security_requirements:
-            yield request
-            return
-
-        # Loop through ALL requirements for the endpoint and apply each one.
+        headers: Dict[str, str] = {}
         for requirement in security_requirements:
-            scheme_name = list(requirement.keys())[0]
+            if not requirement:
+                continue
+            scheme_name = next(iter(requirement))
             scheme_details = self._security_schemes.get(scheme_name)
 
             if not scheme_details:
@@ -139,28 +109,77 @@ class DynamicOASAuth(httpx.Auth):
 
             credential = self._credential_cache.get(scheme_name)
             if not credential:
-                print(f"   - WARNING: No cached credential found for '{scheme_name}'. Skipping.")
+                logger.warning("No cached credential found for '%s'. Skipping.", scheme_name)
                 continue
 
             auth_type = scheme_details.get("type")
-            
+
             if auth_type == "apiKey":
                 key_name = scheme_details.get("name")
                 key_in = scheme_details.get("in")
                 if key_name and key_in == "header":
-                    request.headers[key_name] = credential
+                    headers[key_name] = credential
 
             elif auth_type == "http":
                 scheme = scheme_details.get("scheme")
                 if scheme == "bearer":
                     # This case is now for downstream APIs that require a Bearer token
-                    request.headers["Authorization"] = f"Bearer {credential}"
+                    headers["Authorization"] = f"Bearer {credential}"
                 elif scheme == "basic":
-                    request.headers["Authorization"] = f"Basic {credential}"
+                    headers["Authorization"] = f"Basic {credential}"
+
+        return tuple(headers.items())
+
+    def _compile_auth_plans(self):
+        """
+        Renders the auth plan of every operation in the spec up front, so the
+        request path only has to look one up.
+        """
+        plans: Dict[Optional[Tuple[str, str]], AuthPlan] = {
+            None: self._render_auth_plan(self._route_index.global_security)
+        }
+        for method, path_template, security in self._route_index.routes():
+            plans[(method, path_template)] = self._render_auth_plan(security)
+        self._auth_plans = plans
+
+    def _get_auth_plan_for_request(self, request: httpx.Request) -> AuthPlan:
+        """
+        Returns the compiled auth plan for a request, recompiling the plan
+        table if a credential change has invalidated it.
+        """
+        if not self._auth_plans:
+            self._compile_auth_plans()
+
+        found = self._route_index.match(request.method, str(request.url.path))
+        if found is not None:
+            key = (request.method.upper(), found[0])
+            logger.debug("Matched %s %s to spec path '%s'", request.method, request.url.path, found[0])
+        else:
+            key = None
+            logger.debug("No operation matches %s %s; using the global auth plan", request.method, request.url.path)
+        return self._auth_plans.get(key, ())
+
+    def auth_flow(self, request: httpx.Request) -> Generator[httpx.Request, httpx.Response, None]:
+        """
+        The main authentication flow. It looks up the compiled auth plan for
+        the request's operation and attaches its headers in one update.
+        """
+        # --- FIX: Clean the incoming Authorization header ---
+        # The original request from the user to the MCP server has its own auth.
+        # We must remove it to avoid sending conflicting credentials to the downstream API.
+        if "Authorization" in request.headers:
+            logger.debug("Removing original Authorization header from user request.")
+            del request.headers["Authorization"]
+        # --- END FIX ---
+
+        # The plan is pre-rendered, so applying auth is a single header update.
+        auth_plan = self._get_auth_plan_for_request(request)
+        if not auth_plan:
+            yield request
+            return
+        request.headers.update(auth_plan)
 
-        # --- ADDED LOGGING ---
-        print("\n" + "="*20 + " DEBUG: Final Outgoing Headers " + "="*20)
-        pprint.pprint(dict(request.headers))
-        print("="*70 + "\n")
-        # --- END LOGGING ---
+        # Guarded so the header dict is never copied when debug output is off.
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Final outgoing headers: %s", dict(request.headers))
         yield request
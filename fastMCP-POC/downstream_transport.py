@@ -0,0 +1,283 @@
+import asyncio
+import os
+import random
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import httpx
+
+from gateway_logging import get_logger
+
+logger = get_logger("downstream")
+
+# Methods that are safe to resend after a transport failure (RFC 9110 §9.2.2).
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"})
+RETRYABLE_STATUS_CODES = frozenset({502, 503, 504})
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout, httpx.RemoteProtocolError)
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+@dataclass
+class DownstreamConfig:
+    """
+    Connection pool, timeout and retry settings for calls to a downstream API.
+    `from_env` reads each field from its DOWNSTREAM_* environment variable.
+    """
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    max_connections_per_host: int = 50
+    http2: bool = False
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    write_timeout: float = 30.0
+    pool_timeout: float = 10.0
+    max_retries: int = 2
+    retry_backoff: float = 0.2
+    retry_backoff_max: float = 2.0
+
+    @classmethod
+    def from_env(cls) -> "DownstreamConfig":
+        return cls(
+            max_connections=_env_int("DOWNSTREAM_MAX_CONNECTIONS", cls.max_connections),
+            max_keepalive_connections=_env_int("DOWNSTREAM_MAX_KEEPALIVE", cls.max_keepalive_connections),
+            keepalive_expiry=_env_float("DOWNSTREAM_KEEPALIVE_EXPIRY", cls.keepalive_expiry),
+            max_connections_per_host=_env_int("DOWNSTREAM_MAX_PER_HOST", cls.max_connections_per_host),
+            http2=os.getenv("DOWNSTREAM_HTTP2", "false").lower() in ("1", "true", "yes", "on"),
+            connect_timeout=_env_float("DOWNSTREAM_CONNECT_TIMEOUT", cls.connect_timeout),
+            read_timeout=_env_float("DOWNSTREAM_READ_TIMEOUT", cls.read_timeout),
+            write_timeout=_env_float("DOWNSTREAM_WRITE_TIMEOUT", cls.write_timeout),
+            pool_timeout=_env_float("DOWNSTREAM_POOL_TIMEOUT", cls.pool_timeout),
+            max_retries=_env_int("DOWNSTREAM_RETRIES", cls.max_retries),
+            retry_backoff=_env_float("DOWNSTREAM_RETRY_BACKOFF", cls.retry_backoff),
+            retry_backoff_max=_env_float("DOWNSTREAM_RETRY_BACKOFF_MAX", cls.retry_backoff_max),
+        )
+
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout,
+        )
+
+
+@dataclass
+class _PoolMetrics:
+    requests: int = 0
+    retries: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    queued: int = 0
+    admitted: int = 0
+    queue_wait_total: float = 0.0
+    queue_wait_max: float = 0.0
+    in_flight_by_host: Dict[str, int] = field(default_factory=dict)
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """
+    An httpx transport tuned for bursts of tool calls to one downstream API.
+
+    Requests wait for a slot (overall, then per host) before reaching the
+    connection pool, for at most `pool_timeout`, and hold it until the
+    response body is closed, which makes queue wait time and pool
+    saturation measurable. Idempotent requests that fail to connect, time out, or get a
+    502/503/504 are retried a bounded number of times with full-jitter backoff.
+    """
+    def __init__(self, config: Optional[DownstreamConfig] = None, name: str = "downstream"):
+        self.config = config or DownstreamConfig.from_env()
+        self.name = name
+        http2 = self.config.http2
+        if http2:
+            try:
+                import h2  # noqa: F401 -- httpx needs it for HTTP/2
+            except ImportError:
+                logger.warning("DOWNSTREAM_HTTP2 is on but the 'h2' package is not installed; using HTTP/1.1.")
+                http2 = False
+
+        self._transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=self.config.max_keepalive_connections,
+                keepalive_expiry=self.config.keepalive_expiry,
+            ),
+            http2=http2,
+        )
+        self._slots = asyncio.Semaphore(self.config.max_connections)
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._metrics = _PoolMetrics()
+        _transports.add(self)
+
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._host_slots.get(host)
+        if semaphore is None:
+            semaphore = self._host_slots[host] = asyncio.Semaphore(self.config.max_connections_per_host)
+        return semaphore
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.config.retry_backoff_max, self.config.retry_backoff * 2 ** attempt))
+
+    async def _acquire(self, host: str):
+        await self._slots.acquire()
+        try:
+            await self._host_semaphore(host).acquire()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def _take_slot(self, host: str) -> "_Slot":
+        """
+        Waits up to `pool_timeout` for an overall and a per-host slot, like
+        httpx's own pool wait, and raises httpx.PoolTimeout past that.
+        """
+        metrics = self._metrics
+        wait_start = time.perf_counter()
+        metrics.queued += 1
+        try:
+            await asyncio.wait_for(self._acquire(host), self.config.pool_timeout)
+        except asyncio.TimeoutError:
+            raise httpx.PoolTimeout(f"No free {self.name} connection slot within {self.config.pool_timeout}s") from None
+        finally:
+            metrics.queued -= 1
+        waited = time.perf_counter() - wait_start
+        metrics.admitted += 1
+        metrics.queue_wait_total += waited
+        metrics.queue_wait_max = max(metrics.queue_wait_max, waited)
+
+        metrics.in_flight += 1
+        metrics.peak_in_flight = max(metrics.peak_in_flight, metrics.in_flight)
+        metrics.in_flight_by_host[host] = metrics.in_flight_by_host.get(host, 0) + 1
+        return _Slot(self, host)
+
+    def _release_slot(self, host: str):
+        metrics = self._metrics
+        metrics.in_flight -= 1
+        metrics.in_flight_by_host[host] -= 1
+        self._host_slots[host].release()
+        self._slots.release()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """
+        Sends `request` holding a slot per attempt. The slot of the returned
+        response is only given back when its body is closed, so the slots
+        count open connections rather than requests awaiting headers.
+        """
+        self._metrics.requests += 1
+        host = request.url.host
+        retries = self.config.max_retries if request.method in IDEMPOTENT_METHODS else 0
+        attempt = 0
+        while True:
+            slot = await self._take_slot(host)
+            try:
+                response = await self._transport.handle_async_request(request)
+            except RETRYABLE_ERRORS as e:
+                slot.release()
+                if attempt >= retries:
+                    raise
+                logger.debug("Retrying %s %s after %s", request.method, request.url, type(e).__name__)
+            except BaseException:
+                slot.release()
+                raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= retries:
+                    response.stream = _SlotReleasingStream(response.stream, slot)
+                    return response
+                try:
+                    await response.aclose()
+                finally:
+                    slot.release()
+                logger.debug("Retrying %s %s after HTTP %s", request.method, request.url, response.status_code)
+
+            # No slot is held while backing off.
+            self._metrics.retries += 1
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool saturation, queueing and retry counters for this transport."""
+        metrics = self._metrics
+        return {
+            "name": self.name,
+            "requests": metrics.requests,
+            "retries": metrics.retries,
+            "in_flight": metrics.in_flight,
+            "peak_in_flight": metrics.peak_in_flight,
+            "max_connections": self.config.max_connections,
+            "saturation": metrics.in_flight / self.config.max_connections,
+            "queued": metrics.queued,
+            "admitted": metrics.admitted,
+            "queue_wait_avg_ms": (metrics.queue_wait_total / metrics.admitted * 1000) if metrics.admitted else 0.0,
+            "queue_wait_max_ms": metrics.queue_wait_max * 1000,
+            "in_flight_by_host": {h: n for h, n in metrics.in_flight_by_host.items() if n},
+        }
+
+
+class _Slot:
+    """One request attempt's hold on a transport's overall and per-host slots."""
+    def __init__(self, transport: PooledTransport, host: str):
+        self._transport = transport
+        self._host = host
+        self._held = True
+
+    def release(self):
+        # Idempotent: a response body can be closed more than once.
+        if self._held:
+            self._held = False
+            self._transport._release_slot(self._host)
+
+
+class _SlotReleasingStream(httpx.AsyncByteStream):
+    """A response body that gives its slot back when it is closed."""
+    def __init__(self, stream: httpx.AsyncByteStream, slot: _Slot):
+        self._stream = stream
+        self._slot = slot
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._slot.release()
+
+
+_transports: "weakref.WeakSet[PooledTransport]" = weakref.WeakSet()
+
+
+def all_transport_stats() -> list:
+    """Returns `stats()` for every live PooledTransport in the process."""
+    return [transport.stats() for transport in list(_transports)]
+
+
+def create_downstream_client(
+    base_url: str,
+    auth: Optional[httpx.Auth] = None,
+    config: Optional[DownstreamConfig] = None,
+    name: str = "downstream",
+) -> httpx.AsyncClient:
+    """
+    Builds the AsyncClient a FastMCP OpenAPI server uses for one downstream
+    API, backed by a PooledTransport and the configured timeouts.
+    """
+    config = config or DownstreamConfig.from_env()
+    return httpx.AsyncClient(
+        base_url=base_url,
+        auth=auth,
+        transport=PooledTransport(config, name=name),
+        timeout=config.timeout(),
+    )
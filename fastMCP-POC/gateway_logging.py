@@ -0,0 +1,126 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import re
+from typing import Any, Iterable, Optional
+
+GATEWAY_LOGGER_NAME = "gateway"
+
+# Header names whose values must never reach a log sink. Security schemes
+# from the downstream spec add their own header names at runtime.
+_SENSITIVE_HEADERS = {"authorization", "proxy-authorization", "cookie", "set-cookie", "x-api-key"}
+_CREDENTIAL_PATTERN = re.compile(r"\b(Bearer|Basic)\s+[^\s'\",]+", re.IGNORECASE)
+REDACTED = "***"
+
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def get_logger(name: Optional[str] = None) -> logging.Logger:
+    """
+    Returns a logger under the gateway namespace, e.g. `gateway.auth`.
+    """
+    return logging.getLogger(f"{GATEWAY_LOGGER_NAME}.{name}" if name else GATEWAY_LOGGER_NAME)
+
+
+def add_sensitive_headers(names: Iterable[str]):
+    """
+    Registers extra header names (case-insensitive) whose values are redacted.
+    """
+    _SENSITIVE_HEADERS.update(name.lower() for name in names if name)
+
+
+def redact(value: Any) -> Any:
+    """
+    Returns a copy of `value` with credentials masked. Mappings have the
+    values of sensitive keys replaced; strings have inline Bearer/Basic
+    credentials replaced. Anything else is returned untouched.
+    """
+    if isinstance(value, str):
+        return _CREDENTIAL_PATTERN.sub(lambda m: f"{m.group(1)} {REDACTED}", value)
+    if hasattr(value, "items"):
+        return {
+            key: REDACTED if str(key).lower() in _SENSITIVE_HEADERS else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return type(value)(redact(item) for item in value)
+    return value
+
+
+class RedactingFilter(logging.Filter):
+    """
+    Masks credentials in a record's arguments before it is formatted. It only
+    runs for records that passed the level check, so disabled debug calls
+    never pay for it.
+    """
+    def filter(self, record: logging.LogRecord) -> bool:
+        if isinstance(record.args, dict):
+            record.args = redact(record.args)
+        elif record.args:
+            record.args = tuple(redact(arg) for arg in record.args)
+        if isinstance(record.msg, str):
+            record.msg = redact(record.msg)
+        return True
+
+
+def _stop_queue_listener():
+    """Flushes and stops the queue listener, if one is running. Safe to call repeatedly."""
+    global _queue_listener
+    if _queue_listener is not None:
+        listener, _queue_listener = _queue_listener, None
+        listener.stop()
+
+
+# Registered once: configure_logging may run several times, and each listener
+# it replaces is stopped there.
+atexit.register(_stop_queue_listener)
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def configure_logging(debug: Optional[bool] = None, use_queue: Optional[bool] = None):
+    """
+    Sets up the gateway's log output once per process.
+
+    Args:
+        debug: Enables DEBUG output for the gateway loggers. Defaults to the
+               GATEWAY_DEBUG environment variable.
+        use_queue: Hands records to a background thread through a queue so
+                   request threads never block on log I/O. Defaults to the
+                   GATEWAY_LOG_QUEUE environment variable.
+    """
+    global _queue_listener
+
+    if debug is None:
+        debug = _env_flag("GATEWAY_DEBUG")
+    if use_queue is None:
+        use_queue = _env_flag("GATEWAY_LOG_QUEUE")
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    if use_queue:
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        handler: logging.Handler = logging.handlers.QueueHandler(log_queue)
+        _stop_queue_listener()
+        _queue_listener = logging.handlers.QueueListener(log_queue, stream_handler)
+        _queue_listener.start()
+    else:
+        _stop_queue_listener()
+        handler = stream_handler
+
+    # Redact on the handler the request thread talks to, so secrets are
+    # masked before a record is queued or written.
+    handler.addFilter(RedactingFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+    get_logger().setLevel(logging.DEBUG if debug else logging.INFO)
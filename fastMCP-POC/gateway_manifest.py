@@ -0,0 +1,73 @@
+import asyncio
+import json
+import re
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from spec import SpecLoader
+
+
+@dataclass
+class ApiEntry:
+    """One downstream API in a gateway manifest."""
+    name: str
+    url: str
+
+
+@dataclass
+class LoadedSpec:
+    """A downstream API's spec, with how long it took to load."""
+    api: ApiEntry
+    spec: Optional[dict]
+    seconds: float
+    error: Optional[str] = None
+
+
+def load_manifest(path: str) -> List[ApiEntry]:
+    """
+    Reads a gateway manifest. The file lists the downstream APIs to serve,
+    each with a namespace `name` (used as the tool prefix) and a spec `url`:
+
+        {"apis": [{"name": "shop", "url": "https://api.example.com/openapi.json"}]}
+    """
+    with open(path, "r") as f:
+        manifest = json.load(f)
+
+    entries = []
+    seen = set()
+    for item in manifest.get("apis", []):
+        name, url = item.get("name"), item.get("url")
+        if not name or not url:
+            raise ValueError(f"Manifest entries need both 'name' and 'url': {item}")
+        # The name becomes a tool prefix, so keep it to identifier-safe characters.
+        if not re.fullmatch(r"[A-Za-z0-9_-]+", name):
+            raise ValueError(f"Manifest name '{name}' may only contain letters, digits, '_' and '-'.")
+        if name in seen:
+            raise ValueError(f"Duplicate manifest name '{name}'.")
+        seen.add(name)
+        entries.append(ApiEntry(name=name, url=url))
+
+    if not entries:
+        raise ValueError(f"No APIs listed in manifest {path}.")
+    return entries
+
+
+async def load_specs(apis: List[ApiEntry], loader: Optional[SpecLoader] = None) -> List[LoadedSpec]:
+    """
+    Loads every API's spec concurrently, so boot time is that of the slowest
+    spec rather than the sum. A spec that fails to load is reported with its
+    error instead of failing the others.
+    """
+    loader = loader or SpecLoader()
+
+    async def load_one(api: ApiEntry) -> LoadedSpec:
+        start = time.perf_counter()
+        try:
+            # Startup runs inside a short-lived loop, so revalidate off-loop.
+            spec = await loader.load(api.url, revalidate_on_thread=True)
+            return LoadedSpec(api, spec, time.perf_counter() - start)
+        except Exception as e:
+            return LoadedSpec(api, None, time.perf_counter() - start, error=str(e))
+
+    return await asyncio.gather(*(load_one(api) for api in apis))
@@ -0,0 +1,312 @@
+import json
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from cachetools import LRUCache
+from eunomia_core import enums, schemas
+
+# The resource attribute the MCP middleware fills with the tool/resource/prompt name.
+RESOURCE_NAME_PATH = "attributes.name"
+
+Predicate = Callable[[Any], bool]
+
+
+def _compile_path(path: str) -> Callable[[Any], Any]:
+    """
+    Compiles a dot-notation attribute path into a getter with the same
+    lookup rules as Eunomia's `get_attribute_value`, without re-splitting
+    the path on every evaluation.
+    """
+    components = tuple(path.split("."))
+
+    def get(obj: Any) -> Any:
+        current = obj
+        for component in components:
+            if hasattr(current, component):
+                current = getattr(current, component)
+            elif isinstance(current, dict) and component in current:
+                current = current[component]
+            elif isinstance(current, list) and component.isdigit() and int(component) < len(current):
+                current = current[int(component)]
+            else:
+                return None
+            if current is None:
+                return None
+        return current
+
+    return get
+
+
+def _compile_operator(operator: enums.ConditionOperator, value: Any) -> Callable[[Any], bool]:
+    """
+    Binds a condition's operator and value into a single-argument test,
+    preserving Eunomia's `apply_operator` semantics (including its
+    `value <op> target` argument order for the numeric operators).
+    """
+    op = enums.ConditionOperator
+    if value is None:
+        return lambda target: False
+    if operator == op.EQUALS:
+        return lambda target: target is not None and value == target
+    if operator == op.NOT_EQUALS:
+        return lambda target: target is not None and value != target
+
+    if isinstance(value, str):
+        string_ops = {
+            op.CONTAINS: lambda target: value in target,
+            op.NOT_CONTAINS: lambda target: value not in target,
+            op.STARTS_WITH: lambda target: target.startswith(value),
+            op.ENDS_WITH: lambda target: target.endswith(value),
+        }
+        test = string_ops.get(operator)
+        if test is not None:
+            return lambda target: isinstance(target, str) and test(target)
+    elif isinstance(value, (int, float)):
+        number_ops = {
+            op.GREATER: lambda target: value > target,
+            op.GREATER_OR_EQUAL: lambda target: value >= target,
+            op.LESS: lambda target: value < target,
+            op.LESS_OR_EQUAL: lambda target: value <= target,
+        }
+        test = number_ops.get(operator)
+        if test is not None:
+            return lambda target: isinstance(target, (int, float)) and test(target)
+    elif isinstance(value, list):
+        if operator == op.IN:
+            return lambda target: target is not None and target in value
+        if operator == op.NOT_IN:
+            return lambda target: target is not None and target not in value
+
+    return lambda target: False
+
+
+def _compile_conditions(conditions: List[schemas.Condition]) -> Predicate:
+    """Compiles a list of conditions into one predicate (AND logic)."""
+    tests = [
+        (_compile_path(condition.path), _compile_operator(condition.operator, condition.value))
+        for condition in conditions
+    ]
+    if not tests:
+        return lambda obj: True
+    return lambda obj: all(test(get(obj)) for get, test in tests)
+
+
+def _hashable(value: Any) -> Any:
+    """Turns attribute values (dicts, lists, ...) into something usable in a cache key."""
+    # Containers are tagged so a dict and a list of pairs never share a key.
+    if isinstance(value, dict):
+        return ("dict", tuple(sorted((str(k), _hashable(v)) for k, v in value.items())))
+    if isinstance(value, (list, tuple, set)):
+        return ("list", tuple(_hashable(v) for v in value))
+    try:
+        hash(value)
+    except TypeError:
+        return json.dumps(value, sort_keys=True, default=str)
+    return value
+
+
+def resolve_policy_path(policy_file: str) -> Path:
+    """
+    Resolves a policy file path. Relative paths that don't exist from the CWD
+    are resolved next to this module, where the `mcp_policies*.json` files live.
+    """
+    path = Path(policy_file)
+    if not path.exists() and not path.is_absolute():
+        path = Path(__file__).parent / policy_file
+    return path
+
+
+def load_policies(*policy_files: str) -> List[schemas.Policy]:
+    """Loads and validates policy JSON files (the `mcp_policies*.json` schema)."""
+    policies = []
+    for policy_file in policy_files:
+        with open(resolve_policy_path(policy_file), "r") as f:
+            policies.append(schemas.Policy.model_validate_json(f.read()))
+    return policies
+
+
+class _CompiledRule:
+    __slots__ = ("order", "rule", "principal_matches", "resource_matches")
+
+    def __init__(self, order: int, rule: schemas.Rule):
+        self.order = order
+        self.rule = rule
+        self.principal_matches = _compile_conditions(rule.principal_conditions)
+        self.resource_matches = _compile_conditions(rule.resource_conditions)
+
+
+class _CompiledPolicy:
+    """
+    One policy's rules indexed by action, then by the resource name they
+    pin with an `attributes.name equals ...` condition. Rules that don't pin
+    a name apply to every resource for their actions.
+    """
+    def __init__(self, policy: schemas.Policy):
+        self.policy = policy
+        self._by_name: Dict[str, Dict[Any, List[_CompiledRule]]] = {}
+        self._any_name: Dict[str, List[_CompiledRule]] = {}
+        self._candidates: Dict[Tuple[str, Any], List[_CompiledRule]] = {}
+
+        for order, rule in enumerate(policy.rules):
+            compiled = _CompiledRule(order, rule)
+            pinned_name = self._pinned_resource_name(rule)
+            for action in rule.actions:
+                if pinned_name is None:
+                    self._any_name.setdefault(action, []).append(compiled)
+                else:
+                    self._by_name.setdefault(action, {}).setdefault(pinned_name, []).append(compiled)
+
+    @staticmethod
+    def _pinned_resource_name(rule: schemas.Rule) -> Any:
+        for condition in rule.resource_conditions:
+            if (
+                condition.path == RESOURCE_NAME_PATH
+                and condition.operator == enums.ConditionOperator.EQUALS
+                and condition.value is not None
+            ):
+                return _hashable(condition.value)
+        return None
+
+    def candidates(self, action: str, name: Any) -> List[_CompiledRule]:
+        """Returns the rules that can match, in the policy's declared order."""
+        key = (action, name)
+        found = self._candidates.get(key)
+        if found is None:
+            pinned = self._by_name.get(action, {}).get(name, [])
+            found = sorted(pinned + self._any_name.get(action, []), key=lambda r: r.order)
+            self._candidates[key] = found
+        return found
+
+    def evaluate(self, request: schemas.CheckRequest, name: Any) -> Optional[_CompiledRule]:
+        """Returns the first rule matching the request, like Eunomia's `evaluate_policy`."""
+        for compiled in self.candidates(request.action, name):
+            if compiled.principal_matches(request.principal) and compiled.resource_matches(request.resource):
+                return compiled
+        return None
+
+
+class CompiledPolicyEngine:
+    """
+    An in-process replacement for Eunomia's policy evaluation. Policy files
+    are loaded and compiled once; each decision then only visits the rules
+    indexed under its action and resource name, and repeated decisions are
+    served from a bounded memo.
+
+    Decisions follow Eunomia's `PolicyEngine.evaluate_all`: an explicit deny
+    in any policy wins, then an explicit allow, then the default effect.
+    It evaluates only the attributes present on the request; PolicyStore
+    merges in the registry fetchers' attributes before calling it.
+    """
+    def __init__(
+        self,
+        policies: Iterable[schemas.Policy],
+        memo_size: int = 10_000,
+        generation: Optional[int] = None,
+    ):
+        """
+        Args:
+            policies: Validated Eunomia policies to compile.
+            memo_size: Maximum number of memoized decisions (LRU eviction);
+                0 disables memoization.
+            generation: Optional version stamp, appended to every decision's
+                reason so audit logs show which compiled rule set served it.
+        """
+        self.generation = generation
+        self._policies = [_CompiledPolicy(policy) for policy in policies]
+        self._principal_getters = self._referenced_getters("principal_conditions")
+        self._resource_getters = [_compile_path(RESOURCE_NAME_PATH)] + [
+            getter for path, getter in self._referenced_paths("resource_conditions")
+            if path != RESOURCE_NAME_PATH
+        ]
+        self._memo: LRUCache = LRUCache(maxsize=memo_size)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_files(cls, *policy_files: str, memo_size: int = 10_000) -> "CompiledPolicyEngine":
+        """
+        Loads and compiles policy JSON files (the `mcp_policies*.json` schema).
+        """
+        return cls(load_policies(*policy_files), memo_size=memo_size)
+
+    def _referenced_paths(self, attribute: str) -> List[Tuple[str, Callable[[Any], Any]]]:
+        paths: Dict[str, Callable[[Any], Any]] = {}
+        for compiled in self._policies:
+            for rule in compiled.policy.rules:
+                for condition in getattr(rule, attribute):
+                    paths.setdefault(condition.path, _compile_path(condition.path))
+        return sorted(paths.items())
+
+    def _referenced_getters(self, attribute: str) -> List[Callable[[Any], Any]]:
+        return [getter for _, getter in self._referenced_paths(attribute)]
+
+    def _decision_key(self, request: schemas.CheckRequest) -> Tuple[Any, ...]:
+        # A decision only depends on the attribute paths some rule actually
+        # reads, so those values (not the whole principal/resource) form the key.
+        principal_key = tuple(_hashable(get(request.principal)) for get in self._principal_getters)
+        resource_key = tuple(_hashable(get(request.resource)) for get in self._resource_getters)
+        return principal_key, request.action, resource_key
+
+    def _decide(self, request: schemas.CheckRequest, name: Any) -> Tuple[bool, str]:
+        explicit_deny = explicit_allow = default_deny = None
+        for compiled in self._policies:
+            matched = compiled.evaluate(request, name)
+            if matched is not None:
+                if matched.rule.effect == enums.PolicyEffect.DENY:
+                    explicit_deny = (matched.rule, compiled.policy)
+                elif matched.rule.effect == enums.PolicyEffect.ALLOW:
+                    explicit_allow = (matched.rule, compiled.policy)
+            elif compiled.policy.default_effect == enums.PolicyEffect.DENY:
+                default_deny = compiled.policy
+
+        if explicit_deny:
+            rule, policy = explicit_deny
+            return False, f"Rule {rule.name} denied the action in policy {policy.name}"
+        if explicit_allow:
+            rule, policy = explicit_allow
+            return True, f"Rule {rule.name} allowed the action in policy {policy.name}"
+        if default_deny:
+            return False, "Action denied by default effect"
+        return False, "Action denied by default because there are no policies"
+
+    def evaluate(self, request: schemas.CheckRequest) -> schemas.CheckResponse:
+        """Returns the decision for a single check request."""
+        key = self._decision_key(request)
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        allowed, reason = self._decide(request, key[2][0])
+        if self.generation is not None:
+            reason = f"{reason} (policy generation {self.generation})"
+        decision = schemas.CheckResponse(allowed=allowed, reason=reason)
+        if self._memo.maxsize:
+            with self._lock:
+                self._memo[key] = decision
+        return decision
+
+    # The two coroutines below match EunomiaBridge, so an engine can stand in
+    # for a middleware's `_eunomia` attribute.
+    async def check(self, request: schemas.CheckRequest) -> schemas.CheckResponse:
+        return self.evaluate(request)
+
+    async def bulk_check(self, requests: List[schemas.CheckRequest]) -> List[schemas.CheckResponse]:
+        return [self.evaluate(request) for request in requests]
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns memo hit/miss counters and the compiled rule count."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "generation": self.generation,
+                "memo_size": len(self._memo),
+                "policies": len(self._policies),
+                "rules": sum(len(compiled.policy.rules) for compiled in self._policies),
+            }
+
@@ -0,0 +1,171 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from eunomia.config import settings
+from eunomia.fetchers import FetcherFactory
+from eunomia_core import schemas
+
+from gateway_logging import get_logger
+from policy_engine import CompiledPolicyEngine, load_policies, resolve_policy_path
+
+logger = get_logger("policy")
+
+
+class PolicyStore:
+    """
+    Serves policy decisions from a CompiledPolicyEngine and swaps in a freshly
+    compiled one whenever a watched policy file changes, without a restart.
+
+    Reloads are copy-on-write: a new engine is built off to the side and
+    published with a single attribute assignment, so the read path takes no
+    lock. A request that already picked up the old engine finishes on it. A
+    file that fails to load or validate leaves the current engine in place.
+    """
+    def __init__(self, *policy_files: str, memo_size: int = 10_000):
+        """
+        Args:
+            policy_files: Policy JSON files to compile (default: mcp_policies.json).
+            memo_size: Decision memo size for each compiled engine.
+        """
+        self._policy_files = policy_files or ("mcp_policies.json",)
+        self._paths = [resolve_policy_path(f).resolve() for f in self._policy_files]
+        self._memo_size = memo_size
+        self._reload_lock = threading.Lock()  # Serializes writers only.
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.reload_failures = 0
+
+        self._engine = CompiledPolicyEngine(load_policies(*self._policy_files), memo_size, generation=1)
+        self.loaded_at = time.time()
+
+    @property
+    def engine(self) -> CompiledPolicyEngine:
+        """The currently published engine. Read once per request and reuse it."""
+        return self._engine
+
+    @property
+    def policy_paths(self) -> List[Path]:
+        """Resolved paths of the policy files this store compiles and watches."""
+        return list(self._paths)
+
+    @property
+    def generation(self) -> int:
+        return self._engine.generation
+
+    def reload(self) -> bool:
+        """
+        Recompiles the policy files and publishes the result. Returns False,
+        keeping the current engine, if the files can't be loaded.
+        """
+        with self._reload_lock:
+            try:
+                policies = load_policies(*self._policy_files)
+            except Exception as e:
+                self.reload_failures += 1
+                logger.error("Policy reload failed, keeping generation %s: %s", self._engine.generation, e)
+                return False
+            engine = CompiledPolicyEngine(policies, self._memo_size, generation=self._engine.generation + 1)
+            self._engine = engine
+            self.loaded_at = time.time()
+        logger.info("Loaded policy generation %s from %s", engine.generation, ", ".join(map(str, self._paths)))
+        return True
+
+    def start_watching(self):
+        """Starts a daemon thread that reloads the store when a policy file changes."""
+        if self._watcher is not None:
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, name="policy-store-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def _watch(self):
+        from watchfiles import watch
+
+        # Watch the directories, not the files: editors often save by writing a
+        # temp file and renaming it over the original.
+        directories = sorted({str(path.parent) for path in self._paths})
+        watched = {str(path) for path in self._paths}
+        for changes in watch(*directories, stop_event=self._stop_event, debounce=200):
+            if any(str(Path(changed).resolve()) in watched for _, changed in changes):
+                self.reload()
+
+    # The two coroutines below match EunomiaBridge, so a store can stand in
+    # for a middleware's `_eunomia` attribute. Like EunomiaServer, they merge
+    # in the registry fetchers' attributes before evaluating and apply the
+    # same bulk limits; only the policy evaluation itself is compiled.
+    async def check(self, request: schemas.CheckRequest) -> schemas.CheckResponse:
+        return await self._check_with(self._engine, request)
+
+    async def bulk_check(self, requests: List[schemas.CheckRequest]) -> List[schemas.CheckResponse]:
+        if not requests:
+            raise ValueError("Empty request list")
+        if len(requests) > settings.BULK_CHECK_MAX_REQUESTS:
+            raise ValueError(f"Too many requests. Maximum allowed: {settings.BULK_CHECK_MAX_REQUESTS}")
+        # One snapshot for the whole batch, so a listing is never split across versions.
+        engine = self._engine
+        return list(await asyncio.gather(*(self._check_with(engine, request) for request in requests)))
+
+    async def _check_with(self, engine: CompiledPolicyEngine, request: schemas.CheckRequest) -> schemas.CheckResponse:
+        await asyncio.gather(
+            _fetch_attributes(request.principal),
+            _fetch_attributes(request.resource),
+        )
+        return engine.evaluate(request)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the serving generation, reload counters and the engine's memo stats."""
+        return {
+            **self._engine.stats(),
+            "loaded_at": self.loaded_at,
+            "reload_failures": self.reload_failures,
+            "policy_files": [str(path) for path in self.policy_paths],
+        }
+
+
+async def _fetch_attributes(entity: schemas.EntityCheck) -> None:
+    """
+    Merges the configured fetchers' attributes into `entity`, as
+    EunomiaServer does. Raises ValueError if a fetched attribute conflicts
+    with one already on the entity.
+    """
+    if entity.attributes is None:
+        entity.attributes = {}
+    fetchers = FetcherFactory.get_all_fetchers()
+    if not entity.uri or not fetchers:
+        return
+    fetched = await asyncio.gather(*(
+        fetcher.fetch_attributes(entity.uri)
+        for fetcher in fetchers.values()
+        if fetcher.config.entity_type is None or fetcher.config.entity_type == entity.type
+    ))
+    for attributes in fetched:
+        for key, value in attributes.items():
+            if key in entity.attributes and entity.attributes[key] != value:
+                raise ValueError(f"For entity '{entity.uri}', attribute '{key}' has more than one value")
+        entity.attributes.update(attributes)
+
+
+def create_policy_store_middleware(*policy_files: str, memo_size: int = 10_000, watch: bool = True):
+    """
+    Builds the standard Eunomia middleware, then routes its policy checks
+    through a PolicyStore over the given files, optionally watching them for
+    changes. Returns `(middleware, store)`.
+    """
+    from eunomia_mcp import create_eunomia_middleware
+
+    store = PolicyStore(*policy_files, memo_size=memo_size)
+    # The middleware loads its own engine from this file; the store replaces it below.
+    middleware = create_eunomia_middleware(policy_file=str(store.policy_paths[0]))
+    middleware._eunomia = store
+    if watch:
+        store.start_watching()
+    return middleware, store
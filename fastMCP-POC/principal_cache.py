@@ -0,0 +1,87 @@
+import copy
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from cachetools import TLRUCache
+
+
+def _detached(principal: Any) -> Any:
+    if hasattr(principal, "model_copy"):
+        return principal.model_copy(deep=True)
+    return copy.deepcopy(principal)
+
+
+class PrincipalCache:
+    """
+    A bounded cache of prebuilt principals keyed by bearer token identity.
+
+    Each entry lives for at most `ttl` seconds and never past the token's own
+    `exp`, so an expired token can't keep resolving to a principal. Every
+    lookup returns its own deep copy, so a request that mutates its principal
+    (e.g. a pydantic `PrincipalCheck`) can't change what later requests get.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        """
+        Args:
+            maxsize: Maximum number of principals held at once (LRU eviction).
+            ttl: Upper bound, in seconds, on how long an entry is reused.
+        """
+        self._ttl = ttl
+        # Values are (expires_at, principal); expiry is wall-clock to match JWT `exp`.
+        self._cache: TLRUCache = TLRUCache(maxsize=maxsize, ttu=self._time_to_use, timer=time.time)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _time_to_use(self, _key: Hashable, value: Tuple[Optional[float], Any], now: float) -> float:
+        expires_at = value[0]
+        deadline = now + self._ttl
+        return deadline if expires_at is None else min(deadline, expires_at)
+
+    @staticmethod
+    def token_key(token: str, *extra: Hashable) -> Tuple[Hashable, ...]:
+        """
+        Builds a cache key from a token without holding the raw secret.
+        `extra` carries any request-derived inputs the principal depends on.
+        """
+        return (hashlib.sha256(token.encode()).hexdigest(), *extra)
+
+    def get_or_build(self, key: Hashable, expires_at: Optional[float], build: Callable[[], Any]) -> Any:
+        """
+        Returns the cached principal for `key`, building and caching it on a miss.
+
+        Args:
+            key: Token identity, usually from `token_key`.
+            expires_at: The token's `exp` as a Unix timestamp, if known.
+            build: Zero-argument callable producing the principal.
+        """
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self.hits += 1
+                return _detached(entry[1])
+            self.misses += 1
+
+        principal = build()
+        if expires_at is None or expires_at > time.time():
+            with self._lock:
+                self._cache[key] = (expires_at, principal)
+        return _detached(principal)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters and the current size, for health checks and logs."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+            }
@@ -0,0 +1,110 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+
+class _RouteNode:
+    """
+    A single path segment in the route trie. Literal children are tried
+    before the `{param}` wildcard child, mirroring how a reader would expect
+    `/users/me` to win over `/users/{id}`.
+    """
+    __slots__ = ("literals", "param", "match")
+
+    def __init__(self):
+        self.literals: Dict[str, "_RouteNode"] = {}
+        self.param: Optional["_RouteNode"] = None
+        self.match: Optional[Tuple[str, list]] = None
+
+
+def _split_path(path: str) -> List[str]:
+    return path.strip("/").split("/")
+
+
+def _is_param(segment: str) -> bool:
+    return segment.startswith("{") and segment.endswith("}")
+
+
+class SecurityRouteIndex:
+    """
+    Compiles the `paths` section of an OpenAPI spec into one segment trie per
+    HTTP method, so resolving the security requirements of a request costs
+    O(path depth) instead of a scan over every path template.
+    """
+    def __init__(self, spec: Dict[str, Any]):
+        """
+        Builds the index from the parsed OpenAPI spec.
+
+        Args:
+            spec: The parsed OpenAPI specification as a dictionary.
+        """
+        self.global_security: list = spec.get("security", [])
+        self._roots: Dict[str, _RouteNode] = {}
+        self._routes: List[Tuple[str, str, list]] = []
+
+        for path_template, path_item in spec.get("paths", {}).items():
+            for method in HTTP_METHODS:
+                operation = path_item.get(method)
+                if operation is None:
+                    continue
+                # Resolve once here: operation-level security overrides the
+                # global requirements, even when it is an explicit empty list.
+                security = operation.get("security", self.global_security)
+                self._insert(method.upper(), path_template, security)
+
+    def _insert(self, method: str, path_template: str, security: list):
+        node = self._roots.setdefault(method, _RouteNode())
+        for segment in _split_path(path_template):
+            if _is_param(segment):
+                if node.param is None:
+                    node.param = _RouteNode()
+                node = node.param
+            else:
+                node = node.literals.setdefault(segment, _RouteNode())
+        # The first template registered for a route keeps it, as in the spec's own ordering.
+        if node.match is None:
+            node.match = (path_template, security)
+            self._routes.append((method, path_template, security))
+
+    def routes(self) -> List[Tuple[str, str, list]]:
+        """
+        Returns every indexed `(METHOD, path_template, security_requirements)`
+        triple, in the order the spec declared them.
+        """
+        return list(self._routes)
+
+    def match(self, method: str, path: str) -> Optional[Tuple[str, list]]:
+        """
+        Returns the `(path_template, security_requirements)` pair for the
+        request, or None if no operation in the spec matches it.
+        """
+        root = self._roots.get(method.upper())
+        if root is None:
+            return None
+        return self._walk(root, _split_path(path), 0)
+
+    def _walk(self, node: _RouteNode, segments: List[str], depth: int) -> Optional[Tuple[str, list]]:
+        if depth == len(segments):
+            return node.match
+
+        segment = segments[depth]
+        literal_child = node.literals.get(segment)
+        if literal_child is not None:
+            found = self._walk(literal_child, segments, depth + 1)
+            if found is not None:
+                return found
+
+        # Only fall back to the wildcard when the literal branch dead-ends.
+        if node.param is not None:
+            return self._walk(node.param, segments, depth + 1)
+        return None
+
+    def security_for(self, method: str, path: str) -> list:
+        """
+        Returns the resolved security requirement list for a request,
+        falling back to the spec's global requirements when nothing matches.
+        """
+        found = self.match(method, path)
+        if found is None:
+            return self.global_security
+        return found[1]
@@ -2,6 +2,17 @@ import requests
 import json
 import yaml
 import httpx
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from gateway_logging import get_logger
+
+logger = get_logger("spec")
 
 openapi_spec = {
     "openapi": "3.0.0",
@@ -40,3 +51,156 @@ def fetch_spec_from_url(url: str) -> dict:
         response = client.get(url)
         response.raise_for_status()
         return response.json()
+
+
+class SpecLoader:
+    """
+    Loads OpenAPI specs through an on-disk cache. A cached spec is returned
+    immediately and revalidated in the background with a conditional GET
+    (If-None-Match / If-Modified-Since), so a gateway replica starts even when
+    the downstream API is slow or down, and an unchanged spec costs a 304.
+
+    Each cache entry is one JSON file holding the spec plus the ETag and
+    Last-Modified headers it was served with.
+    """
+    def __init__(self, cache_dir: Optional[str] = None, timeout: float = 10.0):
+        """
+        Args:
+            cache_dir: Where cache entries live. Defaults to SPEC_CACHE_DIR or `.spec_cache`.
+            timeout: Timeout in seconds for spec requests.
+        """
+        self.cache_dir = Path(cache_dir or os.getenv("SPEC_CACHE_DIR", ".spec_cache"))
+        self.timeout = timeout
+        self._background: set = set()
+
+    def _cache_path(self, url: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+    def read_cache(self, url: str) -> Optional[Dict[str, Any]]:
+        """Returns the cache entry for `url`, or None if missing or unreadable."""
+        try:
+            with open(self._cache_path(url), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, url: str, spec: dict, response: httpx.Response):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "url": url,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "fetched_at": time.time(),
+            "spec": spec,
+        }
+        # Write then rename, so a concurrent reader never sees a half-written entry.
+        path = self._cache_path(url)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    async def fetch(self, url: str, client: Optional[httpx.AsyncClient] = None) -> dict:
+        """Fetches the spec unconditionally and refreshes its cache entry."""
+        async with _client_or(client, self.timeout) as http:
+            response = await http.get(url)
+            response.raise_for_status()
+            spec = response.json()
+        self._write_cache(url, spec, response)
+        return spec
+
+    async def revalidate(self, url: str, client: Optional[httpx.AsyncClient] = None) -> bool:
+        """
+        Sends a conditional GET for a cached spec. Returns True if the server
+        sent a new version (which is then cached), False if it was unchanged.
+        """
+        entry = self.read_cache(url)
+        if entry is None:
+            await self.fetch(url, client)
+            return True
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        async with _client_or(client, self.timeout) as http:
+            response = await http.get(url, headers=headers)
+            if response.status_code == 304:
+                return False
+            response.raise_for_status()
+            spec = response.json()
+
+        self._write_cache(url, spec, response)
+        changed = spec != entry.get("spec")
+        if changed:
+            logger.info("OpenAPI spec at %s changed; the new version applies on next start.", url)
+        return changed
+
+    async def _revalidate_quietly(self, url: str, client: Optional[httpx.AsyncClient] = None):
+        try:
+            await self.revalidate(url, client)
+        except Exception as e:
+            logger.warning("Background revalidation of %s failed, serving cached spec: %s", url, e)
+
+    async def load(
+        self,
+        url: str,
+        client: Optional[httpx.AsyncClient] = None,
+        revalidate_on_thread: bool = False,
+    ) -> dict:
+        """
+        Returns the spec for `url`: from cache if present (scheduling a
+        background revalidation), otherwise from the network.
+
+        Args:
+            client: Client for the fetch, and for the background revalidation
+                when it runs on the current loop.
+            revalidate_on_thread: Revalidate on a daemon thread instead of the
+                running loop; use this when the loop is about to be closed,
+                e.g. inside `asyncio.run` during startup.
+        """
+        entry = self.read_cache(url)
+        if entry is None:
+            return await self.fetch(url, client)
+
+        if revalidate_on_thread:
+            # `client` belongs to the running loop, so the thread's own loop uses a temporary one.
+            threading.Thread(
+                target=asyncio.run,
+                args=(self._revalidate_quietly(url),),
+                name="spec-revalidation",
+                daemon=True,
+            ).start()
+        else:
+            task = asyncio.create_task(self._revalidate_quietly(url, client))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        return entry["spec"]
+
+    def load_blocking(self, url: str) -> dict:
+        """
+        Synchronous entry point for callers without a running event loop, such
+        as `canary2.run_server`. A cache hit returns at once and revalidates on
+        a daemon thread; a miss fetches before returning.
+        """
+        return asyncio.run(self.load(url, revalidate_on_thread=True))
+
+
+class _client_or:
+    """Async context manager yielding `client`, or a temporary AsyncClient if None."""
+    def __init__(self, client: Optional[httpx.AsyncClient], timeout: float):
+        self._client = client
+        self._timeout = timeout
+        self._owned: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self) -> httpx.AsyncClient:
+        if self._client is not None:
+            return self._client
+        self._owned = httpx.AsyncClient(timeout=self._timeout, follow_redirects=True)
+        return self._owned
+
+    async def __aexit__(self, *exc_info):
+        if self._owned is not None:
+            await self._owned.aclose()
@@ -0,0 +1,90 @@
+# basket_ops.py
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import delete, literal, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import selectinload
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from schema import BasketItem, BasketItemCreate, Product, User
+
+_basket = BasketItem.__table__
+
+
+def merge_quantities(items: Iterable[BasketItemCreate]) -> Dict[int, int]:
+    """Sums quantities per product, so a product listed twice becomes one row."""
+    merged: Dict[int, int] = {}
+    for item in items:
+        merged[item.product_id] = merged.get(item.product_id, 0) + item.quantity
+    return merged
+
+
+async def find_missing(session: AsyncSession, user_id: int, product_ids: Iterable[int]) -> Tuple[bool, Set[int]]:
+    """
+    Checks the user and every product in one round trip. Returns whether the
+    user exists and which of `product_ids` don't.
+    """
+    product_ids = set(product_ids)
+    query = union_all(
+        select(literal("user").label("kind"), User.id).where(User.id == user_id),
+        select(literal("product").label("kind"), Product.id).where(Product.id.in_(product_ids)),
+    )
+    rows = (await session.exec(query)).all()
+    user_found = any(kind == "user" for kind, _ in rows)
+    found_products = {found_id for kind, found_id in rows if kind == "product"}
+    return user_found, product_ids - found_products
+
+
+def _insert_for(session: AsyncSession):
+    # ON CONFLICT is dialect-specific; SQLite has the same form as Postgres.
+    return sqlite.insert if session.bind.dialect.name == "sqlite" else postgresql.insert
+
+
+def _upsert_statement(session: AsyncSession, user_id: int, quantities: Dict[int, int]):
+    # Relies on the unique index on (user_id, product_id): the increment happens
+    # inside the statement, so concurrent adds can neither duplicate a row nor
+    # lose each other's quantity.
+    insert = _insert_for(session)
+    stmt = insert(_basket).values([
+        {"user_id": user_id, "product_id": product_id, "quantity": quantity}
+        for product_id, quantity in quantities.items()
+    ])
+    return stmt.on_conflict_do_update(
+        index_elements=[_basket.c.user_id, _basket.c.product_id],
+        set_={"quantity": _basket.c.quantity + stmt.excluded.quantity},
+    )
+
+
+async def upsert_items(session: AsyncSession, user_id: int, quantities: Dict[int, int]):
+    """
+    Adds `quantities` to the user's basket in one statement: new products get
+    a row, existing ones have their quantity incremented.
+    """
+    await session.exec(_upsert_statement(session, user_id, quantities))
+
+
+async def upsert_item(session: AsyncSession, user_id: int, product_id: int, quantity: int) -> BasketItem:
+    """Adds one product to the user's basket in one statement; returns the row as it now stands."""
+    stmt = _upsert_statement(session, user_id, {product_id: quantity}).returning(*_basket.c)
+    row = (await session.exec(stmt)).mappings().one()
+    return BasketItem(**row)
+
+
+async def delete_items(session: AsyncSession, user_id: int, product_ids: Iterable[int]) -> List[int]:
+    """Removes the given products from the user's basket in one statement; returns those removed."""
+    stmt = (
+        delete(_basket)
+        .where(_basket.c.user_id == user_id, _basket.c.product_id.in_(set(product_ids)))
+        .returning(_basket.c.product_id)
+    )
+    return [product_id for (product_id,) in (await session.exec(stmt)).all()]
+
+
+async def load_basket(session: AsyncSession, user_id: int) -> List[BasketItem]:
+    """The user's basket items with their products loaded."""
+    query = (
+        select(BasketItem)
+        .where(BasketItem.user_id == user_id)
+        .options(selectinload(BasketItem.product))
+    )
+    return list((await session.exec(query)).scalars().all())
@@ -0,0 +1,105 @@
+"""
+Requests/sec on GET /api/basket/v2/{user_id}, with the old per-request
+session factory and echo=True engine ("before") and the configured pool
+and shared factory from config.py ("after").
+
+Runs the app in-process through httpx's ASGI transport against DATABASE_URL:
+
+    python bench_basket.py --user-id 1 --requests 500 --concurrency 20
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import time
+from typing import AsyncGenerator, List
+
+import httpx
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import config
+from server import app
+
+
+def legacy_session_dependency():
+    """The previous database layer: echo on, default pool, a new sessionmaker per request."""
+    legacy_engine = create_async_engine(config.engine_url, echo=True, future=True)
+
+    async def legacy_get_session() -> AsyncGenerator[AsyncSession, None]:
+        async_session_factory = sessionmaker(
+            legacy_engine, class_=AsyncSession, expire_on_commit=False
+        )
+        async with async_session_factory() as session:
+            yield session
+
+    return legacy_engine, legacy_get_session
+
+
+async def drive(client: httpx.AsyncClient, path: str, requests: int, concurrency: int):
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.get(path)
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - wall_start
+    return requests / wall, statistics.median(latencies) * 1000 if latencies else 0.0, errors
+
+
+async def run(args):
+    headers = {"x-auth-header": os.getenv("APP_API_KEY", "")}
+    path = f"/api/basket/v2/{args.user_id}"
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        legacy_engine, legacy_get_session = legacy_session_dependency()
+        app.dependency_overrides[config.get_session] = legacy_get_session
+        await drive(client, path, args.concurrency, args.concurrency)  # warm up the pool
+        results["before"] = await drive(client, path, args.requests, args.concurrency)
+        app.dependency_overrides.clear()
+        await legacy_engine.dispose()
+
+        await drive(client, path, args.concurrency, args.concurrency)
+        results["after"] = await drive(client, path, args.requests, args.concurrency)
+
+    await config.engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the basket endpoint before/after the database layer changes.")
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--quiet-echo", action="store_true", help="Send the 'before' run's SQL echo to /dev/null instead of stderr.")
+    args = parser.parse_args()
+
+    if args.quiet_echo:
+        # Echo still formats every statement; this only skips the terminal write.
+        logging.getLogger("sqlalchemy.engine.Engine").handlers = [logging.FileHandler(os.devnull)]
+
+    results = asyncio.run(run(args))
+    print(f"{'':<8} {'req/s':>9} {'p50 ms':>9} {'errors':>7}")
+    for name, (rps, p50, errors) in results.items():
+        print(f"{name:<8} {rps:>9.1f} {p50:>9.2f} {errors:>7}")
+    before, after = results["before"][0], results["after"][0]
+    if before:
+        print(f"speedup: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Fires many simultaneous POST /api/basket/v2/{user_id}/add-items calls for
+the same product and checks the basket ends up with exactly one row whose
+quantity is the exact sum. With the old select-then-update path this lost
+increments or created duplicate rows.
+
+Runs the app in-process through httpx's ASGI transport. By default it uses a
+throwaway SQLite file; pass --database-url to run against a local Postgres
+(the tables are created if missing, and a fresh user and product are added):
+
+    python check_basket_concurrency.py --adds 500 --concurrency 100
+    python check_basket_concurrency.py --database-url postgresql+asyncpg://localhost/shop_test
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import uuid
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check basket adds stay exact under concurrency.")
+    parser.add_argument("--adds", type=int, default=500, help="Total add-items calls.")
+    parser.add_argument("--concurrency", type=int, default=100, help="Calls in flight at once.")
+    parser.add_argument("--quantity", type=int, default=3, help="Quantity sent with each call.")
+    parser.add_argument("--database-url", help="Defaults to a temporary SQLite database.")
+    return parser.parse_args()
+
+
+async def run(args) -> bool:
+    # Imported here so DATABASE_URL and APP_API_KEY are set before config.py and server.py read them.
+    import httpx
+    from sqlmodel import SQLModel, select
+
+    import config
+    from schema import BasketItem, Product, User
+    from server import app
+
+    async with config.engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async with config.async_session_factory() as session:
+        user = User(email=f"concurrency-{uuid.uuid4().hex}@example.com")
+        product = Product(name="concurrency check", price=1.0, stock=0)
+        session.add_all([user, product])
+        await session.commit()
+        user_id, product_id = user.id, product.id
+
+    headers = {"x-auth-header": os.environ["APP_API_KEY"]}
+    path = f"/api/basket/v2/{user_id}/add-items"
+    body = {"product_id": product_id, "quantity": args.quantity}
+    gate = asyncio.Semaphore(args.concurrency)
+    statuses = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check", headers=headers) as client:
+        async def add():
+            async with gate:
+                response = await client.post(path, json=body)
+                statuses.append(response.status_code)
+
+        await asyncio.gather(*(add() for _ in range(args.adds)))
+
+    async with config.async_session_factory() as session:
+        rows = (await session.exec(
+            select(BasketItem).where(BasketItem.user_id == user_id, BasketItem.product_id == product_id)
+        )).all()
+    await config.engine.dispose()
+
+    failed = [status for status in statuses if status != 200]
+    expected = args.adds * args.quantity
+    actual = sum(row.quantity for row in rows)
+    print(f"calls: {len(statuses)}  failed: {len(failed)}  rows: {len(rows)}  quantity: {actual} (expected {expected})")
+    return not failed and len(rows) == 1 and actual == expected
+
+
+def main():
+    args = parse_args()
+    # In-process only: the app is built after this, so it expects the same throwaway key.
+    os.environ["APP_API_KEY"] = f"concurrency-check-{uuid.uuid4().hex}"
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        path = os.path.join(tempfile.mkdtemp(), "basket_concurrency.db")
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+
+    ok = asyncio.run(run(args))
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,10 @@
 # database.py
 import os
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Dict
 from dotenv import load_dotenv
 
 # --- SQLAlchemy and SQLModel Imports ---
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, async_sessionmaker
 # FIX: Import AsyncSession from SQLModel to get the .exec() method
 from sqlmodel.ext.asyncio.session import AsyncSession
 from schema import SQLModel # Use your own models file
@@ -24,15 +23,47 @@ engine_url = DATABASE_URL.replace("postgres://", "postgresql+asyncpg://")
 if '?' in engine_url:
     engine_url = engine_url.split('?')[0]
 
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """
+    Engine settings from the DB_* environment variables. SQL echo is off
+    unless DB_ECHO is set, since it logs every statement synchronously.
+    """
+    options: Dict[str, Any] = {
+        "echo": _env_bool("DB_ECHO", False),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    }
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        )
+    if "+asyncpg" in url:
+        # Behind a transaction-mode pooler (e.g. Neon's -pooler host, PgBouncer)
+        # set both cache sizes to 0, since prepared statements don't survive there.
+        options["connect_args"] = {
+            "statement_cache_size": int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100")),
+            "prepared_statement_cache_size": int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "100")),
+        }
+    return options
+
+
 # Create the async engine
-engine: AsyncEngine = create_async_engine(engine_url, echo=True, future=True)
+engine: AsyncEngine = create_async_engine(engine_url, **engine_options(engine_url))
+
+# Built once; every request's session comes from this factory and the engine's pool.
+async_session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency to get a SQLModel-specific asynchronous database session.
     """
-    async_session_factory = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
     async with async_session_factory() as session:
-        yield session
\ No newline at end of file
+        yield session
@@ -0,0 +1,38 @@
+# export.py
+import json
+from typing import AsyncIterator, List
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Table, select
+
+from config import async_session_factory
+
+EXPORT_BATCH_SIZE = 1000
+
+
+async def ndjson_rows(table: Table, columns: List[str], batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    """
+    Yields every row of `table`, in id order, as newline-delimited JSON.
+    Rows come from a server-side cursor `batch_size` at a time, so memory
+    stays flat however large the table, and the first batch is sent while
+    the rest are still being read.
+    """
+    query = (
+        select(*(table.c[name] for name in columns))
+        .order_by(table.c.id)
+        .execution_options(yield_per=batch_size)
+    )
+    # The session is opened here rather than through Depends(get_session), so
+    # it stays open for as long as the response is streaming.
+    async with async_session_factory() as session:
+        result = await session.stream(query)
+        async for batch in result.mappings().partitions():
+            yield "".join(json.dumps(dict(row), default=str) + "\n" for row in batch).encode()
+
+
+def ndjson_response(table: Table, columns: List[str], filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        ndjson_rows(table, columns),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,25 @@
+-- One basket row per (user_id, product_id), required by the basket upserts
+-- (INSERT ... ON CONFLICT (user_id, product_id)). Merges existing duplicates
+-- into their oldest row first. Safe to run more than once.
+BEGIN;
+
+UPDATE basketitem AS keep
+SET quantity = dup.total
+FROM (
+    SELECT min(id) AS keep_id, sum(quantity) AS total
+    FROM basketitem
+    GROUP BY user_id, product_id
+    HAVING count(*) > 1
+) AS dup
+WHERE keep.id = dup.keep_id;
+
+DELETE FROM basketitem AS extra
+USING basketitem AS keep
+WHERE extra.user_id = keep.user_id
+  AND extra.product_id = keep.product_id
+  AND extra.id > keep.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_basketitem_user_product
+    ON basketitem (user_id, product_id);
+
+COMMIT;
@@ -0,0 +1,71 @@
+# pagination.py
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Table, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(last_id: int) -> str:
+    """Opaque cursor pointing just past the row with id `last_id`."""
+    payload = json.dumps({"v": 1, "after": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Returns the id a cursor points past, or None for the first page."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(payload["after"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> List[str]:
+    """
+    Turns a `fields=name,price` query value into column names, always
+    including `id` (the cursor needs it). No value means every allowed field.
+    """
+    if not fields:
+        return list(allowed)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}",
+        )
+    return ["id"] + [f for f in requested if f != "id"]
+
+
+async def fetch_page(
+    session: AsyncSession,
+    table: Table,
+    columns: List[str],
+    limit: int,
+    cursor: Optional[str],
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Reads one page of `table` in id order, selecting only `columns`, with a
+    keyset condition (`id > cursor`) so every page costs the same however
+    deep it is. Returns the rows and the cursor for the next page, if any.
+    """
+    after = decode_cursor(cursor)
+    query = select(*(table.c[name] for name in columns)).order_by(table.c.id).limit(limit + 1)
+    if after is not None:
+        query = query.where(table.c.id > after)
+
+    result = await session.exec(query)
+    rows = [dict(row) for row in result.mappings().all()]
+    # One extra row tells us whether another page exists without a COUNT.
+    next_cursor = encode_cursor(rows[limit - 1]["id"]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
@@ -7,7 +7,11 @@ from sqlalchemy.orm import selectinload
 from typing import List
 
 from config import get_session
-from schema import BasketItem, BasketItemCreate, Product, User, BasketItemPublic
+from schema import (
+    BasketItem, BasketItemCreate, BasketItemsCreate, BasketItemsRemove, BasketItemsRemoved,
+    BasketItemPublic,
+)
+import basket_ops
 
 router = APIRouter(
     prefix="/api/basket/v2", 
@@ -27,28 +31,16 @@ router = APIRouter(
 async def add_item_to_basket(
     user_id: int, item: BasketItemCreate, session: AsyncSession = Depends(get_session)
 ):
-    # FIX: Made the function async and awaited all database calls
-    user = await session.get(User, user_id)
-    if not user:
+    user_found, missing_products = await basket_ops.find_missing(session, user_id, [item.product_id])
+    if not user_found:
         raise HTTPException(status_code=404, detail="User not found")
-    
-    product = await session.get(Product, item.product_id)
-    if not product:
+    if missing_products:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    result = await session.exec(
-        select(BasketItem).where(BasketItem.user_id == user_id, BasketItem.product_id == item.product_id)
-    )
-    db_item = result.first()
-
-    if db_item:
-        db_item.quantity += item.quantity
-    else:
-        db_item = BasketItem(user_id=user_id, product_id=item.product_id, quantity=item.quantity)
-        session.add(db_item)
-    
+    # A single upsert rather than select-then-update, so parallel adds of the
+    # same product all land on one row with the exact total.
+    db_item = await basket_ops.upsert_item(session, user_id, item.product_id, item.quantity)
     await session.commit()
-    await session.refresh(db_item)
     return db_item
 
 @router.get(
@@ -99,3 +91,53 @@ async def remove_item_from_basket(user_id: int, product_id: int, session: AsyncS
     await session.delete(item_to_delete)
     await session.commit()
     return {"ok": True, "detail": "Item removed"}
+
+@router.post(
+    "/{user_id}/add-items-bulk",
+    response_model=List[BasketItemPublic],
+    summary="Add several basket items at once",
+    description="""
+    add many products to a user's basket in one call, each with a product_id and a quantity
+    greater than 0, up to 100 items per call. Products already in the basket have their quantity increased. Prefer this over calling
+    add-items once per product. Returns the whole basket afterwards.
+    """,
+    response_description="default errors, or a 404 naming the missing user or products, or " \
+    "200 ok with the user's full basket after the update"
+)
+async def add_items_to_basket(
+    user_id: int, body: BasketItemsCreate, session: AsyncSession = Depends(get_session)
+):
+    quantities = basket_ops.merge_quantities(body.items)
+
+    user_found, missing_products = await basket_ops.find_missing(session, user_id, quantities)
+    if not user_found:
+        raise HTTPException(status_code=404, detail="User not found")
+    if missing_products:
+        raise HTTPException(status_code=404, detail=f"Products not found: {sorted(missing_products)}")
+
+    # One INSERT ... ON CONFLICT DO UPDATE for every item, in this one transaction.
+    await basket_ops.upsert_items(session, user_id, quantities)
+    basket_items = await basket_ops.load_basket(session, user_id)
+    await session.commit()
+    return basket_items
+
+@router.post(
+    "/{user_id}/remove-items-bulk",
+    response_model=BasketItemsRemoved,
+    summary="Remove several basket items at once",
+    description="""
+    remove many products from a user's basket in one call, given up to 100 product ids.
+    Ids that are not in the basket are reported in not_found rather than failing the call.
+    """,
+    response_description="default errors, or 200 ok with the product ids removed and those not found"
+)
+async def remove_items_from_basket(
+    user_id: int, body: BasketItemsRemove, session: AsyncSession = Depends(get_session)
+):
+    removed = await basket_ops.delete_items(session, user_id, body.product_ids)
+    await session.commit()
+    return {
+        "ok": True,
+        "removed": sorted(removed),
+        "not_found": sorted(set(body.product_ids) - set(removed)),
+    }
@@ -1,13 +1,14 @@
 # routers/products_router.py
-from fastapi import APIRouter, Depends, Security, HTTPException
+from fastapi import APIRouter, Depends, Security, HTTPException, Query
 from fastapi.security import APIKeyHeader
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy import text
-from typing import List
+from typing import Optional
 
 from config import get_session
-from schema import Product, ProductPublic
+from schema import Product, ProductPublic, ProductPage
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, fetch_page, parse_fields
+from export import ndjson_response
 from dotenv import load_dotenv
 import os
 
@@ -52,17 +53,42 @@ async def verify_second_one_time_key(api_key_two: str = Security(api_key_header_
 
 @router.get(
     "/get-all", 
-    response_model=List[ProductPublic],
+    response_model=ProductPage,
+    # Fields left out by `fields` are omitted, not sent as null.
+    response_model_exclude_unset=True,
     summary="Get All Products in store",
     description="""
-    This endpoint returns an array of product objects, each containing details like
-    id, name, description, price, and current stock level.
+    This endpoint returns one page of products in id order, each containing details like
+    id, name, description and price. Use `limit` for the page size and pass the returned
+    `next_cursor` as `cursor` to fetch the next page; `next_cursor` is null on the last page.
+    Use `fields` (e.g. fields=name,price) to return only the fields you need; id is always included.
     """,
-    response_description="A JSON array of all products in the store.",
+    response_description="A JSON object with an `items` array of products and a `next_cursor`.",
     dependencies=[Depends(verify_first_one_time_key), Depends(verify_second_one_time_key)]
 )
-async def get_products(session: AsyncSession = Depends(get_session)):
-    query = text("SELECT id, name, description, price, stock FROM product")
-    result = await session.exec(query)
-    products = result.mappings().all()
-    return products
+async def get_products(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Products per page."),
+    cursor: Optional[str] = Query(None, description="The `next_cursor` from the previous page."),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return: id, name, description, price."),
+    session: AsyncSession = Depends(get_session),
+):
+    columns = parse_fields(fields, list(ProductPublic.model_fields))
+    items, next_cursor = await fetch_page(session, Product.__table__, columns, limit, cursor)
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get(
+    "/export",
+    summary="Export all products as NDJSON",
+    description="""
+    Streams every product, in id order, as newline-delimited JSON (one object per line),
+    for bulk syncs. Use `fields` (e.g. fields=name,price,stock) to export only some columns;
+    id is always included. Prefer /get-all for browsing; this returns the whole table.
+    """,
+    response_description="An application/x-ndjson stream with one product object per line.",
+    dependencies=[Depends(verify_first_one_time_key), Depends(verify_second_one_time_key)]
+)
+async def export_products(
+    fields: Optional[str] = Query(None, description="Comma-separated fields to export: id, name, description, price, stock."),
+):
+    columns = parse_fields(fields, list(Product.__table__.columns.keys()))
+    return ndjson_response(Product.__table__, columns, "products.ndjson")
@@ -1,11 +1,13 @@
 # routers/users_router.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from typing import List
+from typing import Optional
 
 from config import get_session
-from schema import User, UserCreate, UserPublic
+from schema import User, UserCreate, UserPublic, UserPage
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, fetch_page, parse_fields
+from export import ndjson_response
 
 router = APIRouter(prefix="/api/users/v2", tags=["Users"])
 
@@ -38,14 +40,40 @@ async def create_user(user: UserCreate, session: AsyncSession = Depends(get_sess
 
 @router.get(
     "/get-all-users", 
-    response_model=List[UserPublic],
+    response_model=UserPage,
+    # Fields left out by `fields` are omitted, not sent as null.
+    response_model_exclude_unset=True,
     summary="Get all users",
     description="""
-    Retrieve all user ids, emails and full names in the app. Useful for when information about users is required.
+    Retrieve user ids, emails and full names in the app, one page at a time in id order.
+    Useful for when information about users is required. Use `limit` for the page size and
+    pass the returned `next_cursor` as `cursor` for the next page; it is null on the last page.
+    Use `fields` (e.g. fields=email) to return only the fields you need; id is always included.
     """,
-    response_description="default errors, or a 200 ok with array of users objects added to the database"
+    response_description="default errors, or a 200 ok with an `items` array of user objects and a `next_cursor`"
 )
-async def read_users(session: AsyncSession = Depends(get_session)):
-    result = await session.exec(select(User))
-    users = result.all()
-    return users
+async def read_users(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Users per page."),
+    cursor: Optional[str] = Query(None, description="The `next_cursor` from the previous page."),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return: id, email, full_name."),
+    session: AsyncSession = Depends(get_session),
+):
+    columns = parse_fields(fields, list(UserPublic.model_fields))
+    items, next_cursor = await fetch_page(session, User.__table__, columns, limit, cursor)
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get(
+    "/export",
+    summary="Export all users as NDJSON",
+    description="""
+    Streams every user, in id order, as newline-delimited JSON (one object per line),
+    for bulk syncs. Use `fields` (e.g. fields=email) to export only some columns; id is
+    always included. Prefer /get-all-users for browsing; this returns the whole table.
+    """,
+    response_description="An application/x-ndjson stream with one user object per line."
+)
+async def export_users(
+    fields: Optional[str] = Query(None, description="Comma-separated fields to export: id, email, full_name."),
+):
+    columns = parse_fields(fields, list(User.__table__.columns.keys()))
+    return ndjson_response(User.__table__, columns, "users.ndjson")
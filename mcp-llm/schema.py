@@ -1,6 +1,7 @@
 # models.py
 from typing import Optional, List
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 
 # --- Product Models ---
 # Forward reference to BasketItem is needed because BasketItem is defined later
@@ -21,6 +22,21 @@ class ProductPublic(SQLModel):
     description: Optional[str] = None
     price: float
 
+class ProductPageItem(SQLModel):
+    """A ProductPublic limited to the requested `fields`; only id is always present."""
+    id: int
+    name: Optional[str] = None
+    description: Optional[str] = None
+    price: Optional[float] = None
+
+class ProductPage(SQLModel):
+    """
+    One page of products, each holding the requested fields. Pass
+    `next_cursor` back as `cursor` to get the next page; it is null on the last.
+    """
+    items: List[ProductPageItem]
+    next_cursor: Optional[str] = None
+
 # --- User Models ---
 # Forward reference to BasketItem
 class User(SQLModel, table=True):
@@ -40,8 +56,28 @@ class UserPublic(SQLModel):
     email: str
     full_name: Optional[str] = None
 
+class UserPageItem(SQLModel):
+    """A UserPublic limited to the requested `fields`; only id is always present."""
+    id: int
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+
+class UserPage(SQLModel):
+    """
+    One page of users, each holding the requested fields. Pass
+    `next_cursor` back as `cursor` to get the next page; it is null on the last.
+    """
+    items: List[UserPageItem]
+    next_cursor: Optional[str] = None
+
 # --- Basket Models ---
 class BasketItem(SQLModel, table=True):
+    # One row per user and product; bulk adds upsert against this index.
+    # Existing databases: see migrations/001_basketitem_unique_user_product.sql
+    __table_args__ = (
+        Index("uq_basketitem_user_product", "user_id", "product_id", unique=True),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     quantity: int
     
@@ -56,7 +92,23 @@ class BasketItem(SQLModel, table=True):
 
 class BasketItemCreate(SQLModel):
     product_id: int
-    quantity: int
+    quantity: int = Field(gt=0)
+
+# Most products one bulk basket call may touch, keeping each upsert/delete statement bounded.
+MAX_BULK_BASKET_ITEMS = 100
+
+class BasketItemsCreate(SQLModel):
+    """Several products to add to a basket at once."""
+    items: List[BasketItemCreate] = Field(min_length=1, max_length=MAX_BULK_BASKET_ITEMS)
+
+class BasketItemsRemove(SQLModel):
+    """Several products to remove from a basket at once."""
+    product_ids: List[int] = Field(min_length=1, max_length=MAX_BULK_BASKET_ITEMS)
+
+class BasketItemsRemoved(SQLModel):
+    ok: bool
+    removed: List[int]
+    not_found: List[int]
 
 # --- Richer Response Model for the Basket ---
 class BasketItemPublic(SQLModel):
@@ -32,7 +32,7 @@ function toCoreMessages(messages: Array<UIMessage>) {
     })
 }
 
-async function callGeminiBackend(messages: Array<UIMessage>) {
+async function callGeminiBackend(messages: Array<UIMessage>, conversationId: string) {
   try {
     const response = await fetch("http://localhost:5328/api/chat/gemini", {
       method: "POST",
@@ -41,6 +41,8 @@ async function callGeminiBackend(messages: Array<UIMessage>) {
       },
       body: JSON.stringify({
         messages: toCoreMessages(messages),
+        // Lets the backend reuse this chat's cached summary of older turns
+        conversation_id: conversationId,
       }),
     })
 
@@ -151,7 +153,7 @@ export async function POST(request: Request) {
     })
 
     try {
-      const geminiResponse = await callGeminiBackend(messages)
+      const geminiResponse = await callGeminiBackend(messages, id)
       const assistantMessageId = generateUUID()
       const content = geminiResponse.response || ""
 
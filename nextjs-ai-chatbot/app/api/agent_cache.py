@@ -0,0 +1,92 @@
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _BuildStats:
+    builds: int = 0
+    hits: int = 0
+    build_seconds_total: float = 0.0
+    build_seconds_max: float = 0.0
+
+    def record_build(self, seconds: float):
+        self.builds += 1
+        self.build_seconds_total += seconds
+        self.build_seconds_max = max(self.build_seconds_max, seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        lookups = self.builds + self.hits
+        return {
+            "builds": self.builds,
+            "hits": self.hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "build_ms_avg": (self.build_seconds_total / self.builds * 1000) if self.builds else 0.0,
+            "build_ms_max": self.build_seconds_max * 1000,
+        }
+
+
+class AgentCache:
+    """
+    Process-wide reuse of chat model clients and compiled agent graphs.
+
+    Model clients (and the HTTP connection pools inside them) are built once
+    per model config and kept for the life of the process. Agent graphs are
+    keyed by (model config, tool-catalog versions of the servers they use),
+    so a graph is only recompiled when a server's tool list actually changes
+    or a different set of servers is in play. At most `max_agents` graphs
+    are kept, least recently used first out.
+    """
+    def __init__(self, max_agents: int = 32):
+        self.max_agents = max_agents
+        self._models: Dict[Hashable, Any] = {}
+        self._agents: "OrderedDict[Tuple[Hashable, Hashable], Any]" = OrderedDict()
+        self._model_stats = _BuildStats()
+        self._agent_stats = _BuildStats()
+
+    def model(self, model_key: Hashable, build: Callable[[], Any]) -> Any:
+        """Returns the shared model client for `model_key`, building it on first use."""
+        model = self._models.get(model_key)
+        if model is not None:
+            self._model_stats.hits += 1
+            return model
+
+        start = time.perf_counter()
+        model = self._models[model_key] = build()
+        self._model_stats.record_build(time.perf_counter() - start)
+        logger.info(f"Built model client for {model_key}")
+        return model
+
+    def agent(self, model_key: Hashable, tools_key: Hashable, build: Callable[[], Any]) -> Any:
+        """
+        Returns the compiled agent for this model and tool set, building it on
+        a miss. `tools_key` must change whenever the tools themselves do, e.g.
+        the `(server_id, catalog version)` pairs they were loaded from.
+        """
+        key = (model_key, tools_key)
+        agent = self._agents.get(key)
+        if agent is not None:
+            self._agents.move_to_end(key)
+            self._agent_stats.hits += 1
+            return agent
+
+        start = time.perf_counter()
+        agent = build()
+        elapsed = time.perf_counter() - start
+        self._agent_stats.record_build(elapsed)
+        logger.info(f"Compiled agent for {model_key} in {elapsed * 1000:.0f} ms")
+
+        self._agents[key] = agent
+        while len(self._agents) > self.max_agents:
+            self._agents.popitem(last=False)
+        return agent
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "models": {"cached": len(self._models), **self._model_stats.as_dict()},
+            "agents": {"cached": len(self._agents), "max": self.max_agents, **self._agent_stats.as_dict()},
+        }
@@ -0,0 +1,113 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict
+
+
+class ServerSaturated(Exception):
+    """Raised when a server's call slots and wait queue are both full."""
+    def __init__(self, server_id: str, retry_after: int):
+        super().__init__(f"MCP server {server_id} is saturated; retry after {retry_after}s")
+        self.server_id = server_id
+        self.retry_after = retry_after
+
+
+@dataclass
+class _ServerSlots:
+    semaphore: asyncio.Semaphore
+    in_flight: int = 0
+    queued: int = 0
+    peak_queued: int = 0
+    admitted: int = 0
+    rejected: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    busy_total: float = 0.0
+    completed: int = 0
+
+
+class ServerConcurrencyLimiter:
+    """
+    Caps concurrent tool calls per MCP server, so one busy server can't
+    monopolize its shared session or pile up unbounded work.
+
+    Up to `max_concurrent` calls per server run at once over its session.
+    Up to `max_queued` more wait for a slot, each for at most
+    `queue_timeout` seconds. Anything beyond that is turned away at once
+    with `ServerSaturated`, which carries a Retry-After estimate.
+    """
+    def __init__(self, max_concurrent: int = 8, max_queued: int = 32, queue_timeout: float = 10.0):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._servers: Dict[str, _ServerSlots] = {}
+
+    def _slots(self, server_id: str) -> _ServerSlots:
+        slots = self._servers.get(server_id)
+        if slots is None:
+            slots = self._servers[server_id] = _ServerSlots(asyncio.Semaphore(self.max_concurrent))
+        return slots
+
+    def _retry_after(self, slots: _ServerSlots) -> int:
+        # Time for the queue ahead to drain at the server's average call duration.
+        avg_call = slots.busy_total / slots.completed if slots.completed else 1.0
+        return max(1, math.ceil(avg_call * (slots.queued + 1) / self.max_concurrent))
+
+    @asynccontextmanager
+    async def slot(self, server_id: str) -> AsyncIterator[None]:
+        """Holds one of the server's call slots, waiting in its queue if needed."""
+        slots = self._slots(server_id)
+        wait_start = time.perf_counter()
+        if not slots.semaphore.locked():
+            # A free slot: acquire() returns without suspending.
+            await slots.semaphore.acquire()
+        else:
+            if slots.queued >= self.max_queued:
+                slots.rejected += 1
+                raise ServerSaturated(server_id, self._retry_after(slots))
+            slots.queued += 1
+            slots.peak_queued = max(slots.peak_queued, slots.queued)
+            try:
+                await asyncio.wait_for(slots.semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                slots.rejected += 1
+                raise ServerSaturated(server_id, self._retry_after(slots)) from None
+            finally:
+                slots.queued -= 1
+
+        waited = time.perf_counter() - wait_start
+        slots.admitted += 1
+        slots.wait_total += waited
+        slots.wait_max = max(slots.wait_max, waited)
+        slots.in_flight += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            slots.in_flight -= 1
+            slots.busy_total += time.perf_counter() - started
+            slots.completed += 1
+            slots.semaphore.release()
+
+    def forget(self, server_id: str):
+        self._servers.pop(server_id, None)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-server queue depth, wait times and rejections."""
+        return {
+            server_id: {
+                "in_flight": slots.in_flight,
+                "max_concurrent": self.max_concurrent,
+                "queued": slots.queued,
+                "peak_queued": slots.peak_queued,
+                "max_queued": self.max_queued,
+                "admitted": slots.admitted,
+                "rejected": slots.rejected,
+                "wait_ms_avg": (slots.wait_total / slots.admitted * 1000) if slots.admitted else 0.0,
+                "wait_ms_max": slots.wait_max * 1000,
+                "call_ms_avg": (slots.busy_total / slots.completed * 1000) if slots.completed else 0.0,
+            }
+            for server_id, slots in self._servers.items()
+        }
@@ -0,0 +1,54 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import mcp.types
+from fastmcp.exceptions import ToolError
+from mcp import ClientSession
+
+# Calls one tool on the session's server: `(tool_name, arguments) -> fastmcp CallToolResult`.
+ToolCaller = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+
+class GatewaySession(ClientSession):
+    """
+    What Gemini is given as an MCP tool in place of a raw `ClientSession`.
+
+    google-genai recognises MCP tools by their `ClientSession` type and only
+    uses `list_tools` and `call_tool`, so this answers the first from the
+    tool catalog and routes the second through `call`, the same per-server
+    call slots, shared session and result cache the LangChain tools use.
+    It never opens streams of its own.
+    """
+    def __init__(self, tools: List[mcp.types.Tool], call: ToolCaller):
+        # Deliberately not calling ClientSession.__init__: there is no transport here.
+        self._tools = tools
+        self._call = call
+
+    async def list_tools(self, *args, **kwargs) -> mcp.types.ListToolsResult:
+        return mcp.types.ListToolsResult(tools=self._tools)
+
+    async def call_tool(
+        self,
+        name: str,
+        arguments: Optional[Dict[str, Any]] = None,
+        *args,
+        **kwargs,
+    ) -> mcp.types.CallToolResult:
+        try:
+            result = await self._call(name, arguments or {})
+        except ToolError as e:
+            return _error_result(str(e))
+        except Exception as e:
+            # Reported to the model like a tool error rather than failing the turn.
+            return _error_result(f"Error calling tool {name}: {e}")
+        return mcp.types.CallToolResult(
+            content=result.content,
+            structuredContent=result.structured_content,
+            isError=result.is_error,
+        )
+
+
+def _error_result(message: str) -> mcp.types.CallToolResult:
+    return mcp.types.CallToolResult(
+        content=[mcp.types.TextContent(type="text", text=message)],
+        isError=True,
+    )
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.api.local_store import LocalStore
+
+logger = logging.getLogger(__name__)
+
+# Folds `(previous_summary, messages)` into a new summary.
+Summarizer = Callable[[str, List[Dict[str, str]]], Awaitable[str]]
+
+
+def trim_text(text: str, limit: int) -> str:
+    """Keeps the head and tail of an oversized text, noting how much was cut."""
+    if limit <= 0 or len(text) <= limit:
+        return text
+    head = limit * 3 // 4
+    tail = limit - head
+    return f"{text[:head]}\n…[{len(text) - limit} characters trimmed]…\n{text[-tail:]}"
+
+
+def _digest(messages: List[Dict[str, str]]) -> str:
+    payload = json.dumps([[m.get("role"), m.get("content", "")] for m in messages])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@dataclass
+class CompactedHistory:
+    """What a chat turn sends: a summary of older turns plus recent ones verbatim."""
+    summary: str
+    messages: List[Dict[str, str]]
+    summarized_count: int
+    # Older messages left out without being summarized, when the summarizer failed.
+    dropped_count: int = 0
+
+
+class HistoryManager:
+    """
+    Bounds the history sent to the model on each turn.
+
+    The most recent messages are kept verbatim. Older ones are folded into a
+    rolling summary that is cached per conversation in Redis, along with how
+    many messages it covers and a digest of them. The next turn then only
+    folds in what has aged out since. Folding happens once more than
+    `keep_recent + fold_every` messages are unsummarized, so the summarizer
+    runs every few turns, not on every one. Oversized message contents are
+    trimmed to `max_message_chars`. If the summarizer fails, the turn goes
+    ahead with the existing summary and only the recent messages, and the
+    fold is retried on the next turn.
+    """
+    def __init__(
+        self,
+        redis,
+        summarize: Summarizer,
+        keep_recent: int = 8,
+        fold_every: int = 6,
+        max_message_chars: int = 4000,
+        summary_ttl: int = 7 * 24 * 3600,
+        key_prefix: str = "chat:summary",
+    ):
+        """
+        Args:
+            redis: A redis.asyncio client, or None to keep summaries in this process only.
+            summarize: Folds older messages into the running summary.
+            keep_recent: Messages always sent verbatim.
+            fold_every: Extra messages allowed to pile up before the next fold.
+            max_message_chars: Longest message content sent as-is; 0 disables trimming.
+            summary_ttl: Seconds a conversation's summary is kept after its last update.
+            key_prefix: Prefix of the Redis keys summaries are stored under.
+        """
+        self._redis = redis if redis is not None else LocalStore()
+        self._summarize = summarize
+        self.keep_recent = keep_recent
+        self.fold_every = fold_every
+        self.max_message_chars = max_message_chars
+        self.summary_ttl = summary_ttl
+        self._key_prefix = key_prefix
+        self._turns = 0
+        self._prompt_chars_total = 0
+        self._prompt_chars_max = 0
+        self._prompt_chars_last = 0
+        self._folds = 0
+        self._summary_reuses = 0
+        self._summary_failures = 0
+
+    def _key(self, conversation_id: str) -> str:
+        return f"{self._key_prefix}:{conversation_id}"
+
+    async def _load(self, conversation_id: str) -> Optional[Dict]:
+        raw = await self._redis.get(self._key(conversation_id))
+        if raw is None:
+            return None
+        return json.loads(raw.decode() if isinstance(raw, bytes) else raw)
+
+    async def compact(self, conversation_id: Optional[str], messages: List[Dict[str, str]]) -> CompactedHistory:
+        """
+        Returns the summary and verbatim messages to send for this turn.
+        Without a conversation_id, the first message stands in as its identity.
+        """
+        if conversation_id is None and messages:
+            conversation_id = "anon-" + _digest(messages[:1])
+
+        cached = await self._load(conversation_id) if conversation_id else None
+        summary, covered = "", 0
+        if cached and cached["covered"] <= len(messages) and _digest(messages[:cached["covered"]]) == cached["digest"]:
+            summary, covered = cached["summary"], cached["covered"]
+            self._summary_reuses += 1
+
+        send_from = covered
+        if len(messages) - covered > self.keep_recent + self.fold_every:
+            fold_to = len(messages) - self.keep_recent
+            to_fold = [
+                {**m, "content": trim_text(m.get("content", ""), self.max_message_chars)}
+                for m in messages[covered:fold_to]
+            ]
+            try:
+                new_summary = await self._summarize(summary, to_fold)
+            except Exception as e:
+                # Plain truncation for this turn; nothing is cached, so the next turn folds again.
+                self._summary_failures += 1
+                logger.warning(f"Summarizing history of {conversation_id} failed, sending only recent messages: {e}")
+                send_from = fold_to
+                new_summary = None
+        else:
+            new_summary = None
+
+        if new_summary is not None:
+            summary, covered = new_summary, fold_to
+            send_from = covered
+            self._folds += 1
+            if conversation_id:
+                await self._redis.set(
+                    self._key(conversation_id),
+                    json.dumps({"covered": covered, "digest": _digest(messages[:covered]), "summary": summary}),
+                    ex=self.summary_ttl,
+                )
+            logger.info(f"Folded history of {conversation_id} into a summary covering {covered} messages")
+
+        recent = [
+            {**m, "content": trim_text(m.get("content", ""), self.max_message_chars)}
+            for m in messages[send_from:]
+        ]
+        return CompactedHistory(
+            summary=summary, messages=recent, summarized_count=covered, dropped_count=send_from - covered
+        )
+
+    def record_prompt(self, prompt_chars: int):
+        """Records the size of the prompt a turn actually sent."""
+        self._turns += 1
+        self._prompt_chars_last = prompt_chars
+        self._prompt_chars_total += prompt_chars
+        self._prompt_chars_max = max(self._prompt_chars_max, prompt_chars)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "turns": self._turns,
+            "prompt_chars_last": self._prompt_chars_last,
+            "prompt_chars_avg": self._prompt_chars_total / self._turns if self._turns else 0.0,
+            "prompt_chars_max": self._prompt_chars_max,
+            "folds": self._folds,
+            "summary_reuses": self._summary_reuses,
+            "summary_failures": self._summary_failures,
+            "keep_recent": self.keep_recent,
+        }
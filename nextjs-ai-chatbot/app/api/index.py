@@ -1,24 +1,37 @@
 from dotenv import load_dotenv # <-- 1. ADD THIS IMPORT
 load_dotenv() # <-- 2. ADD THIS LINE TO LOAD THE .ENV FILE
 
-from quart import Quart, request, jsonify, redirect
+from quart import Quart, Response, request, jsonify, redirect
 from quart_session import Session
 from quart_cors import cors
 import logging
 import uuid
 import redis # <-- NEW: Import the redis library
+import redis.asyncio
 import os # <-- NEW: Import os to read the environment variable
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional
 import asyncio
+import functools
+import hashlib
 
 from fastmcp import Client
+from fastmcp.client.auth import OAuth
 from mcp import ClientSession
 from mcp.client.streamable_http import streamablehttp_client
 from langchain_mcp_adapters.tools import load_mcp_tools
 from langgraph.prebuilt import create_react_agent
 from langchain_xai import ChatXAI
 import json
-from langchain_core.tools import Tool # <-- NEW: Import Tool from langchain_core
+from langchain_core.tools import StructuredTool
+from app.api.mcp_sessions import MCPSessionManager
+from app.api.tool_catalog import ToolCatalog
+from app.api.agent_cache import AgentCache
+from app.api.server_registry import ServerRegistry
+from app.api.concurrency import ServerConcurrencyLimiter, ServerSaturated
+from app.api.tool_results import ToolResultCache
+from app.api.history import HistoryManager, trim_text
+from app.api.gemini_tools import GatewaySession
 from google import genai
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 
@@ -33,7 +46,16 @@ app.config["SESSION_TYPE"] = "redis"
 app.config["SESSION_REDIS"] = redis.from_url(os.getenv("REDIS_URL"))
 Session(app)
 
-authenticated_clients: Dict[str, Any] = {}
+# One long-lived, health-checked MCP session per server_id, shared by all requests.
+session_manager = MCPSessionManager(
+    health_check_interval=float(os.getenv("MCP_HEALTH_CHECK_INTERVAL", "30"))
+)
+# Caps concurrent tool calls per server, with a bounded wait queue; beyond that, callers get a 429.
+call_limiter = ServerConcurrencyLimiter(
+    max_concurrent=int(os.getenv("MCP_MAX_CONCURRENT_CALLS", "8")),
+    max_queued=int(os.getenv("MCP_MAX_QUEUED_CALLS", "32")),
+    queue_timeout=float(os.getenv("MCP_CALL_QUEUE_TIMEOUT", "10")),
+)
 # Add httpx for the auth flow
 # import httpx
 
@@ -45,6 +67,193 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Longest tool output handed back to the model; the middle of longer ones is cut.
+MAX_TOOL_OUTPUT_CHARS = int(os.getenv("MCP_MAX_TOOL_OUTPUT_CHARS", "8000"))
+
+
+def build_langchain_tools(server_id: str, client: Client, tools_list) -> list:
+    """
+    Converts FastMCP tools to async LangChain structured tools whose argument
+    schema is the tool's inputSchema, so the agent can run several tool calls
+    from one step concurrently.
+    """
+    def make_tool_coroutine(tool_name: str):
+        # Bound per tool so each coroutine calls its own tool on its own server's session.
+        async def call_tool(**kwargs):
+            try:
+                result = await call_server_tool(server_id, client, tool_name, kwargs)
+                # Oversized outputs would otherwise be resent to the model on every later step
+                return trim_text(str(result), MAX_TOOL_OUTPUT_CHARS)
+            except ServerSaturated as e:
+                return f"Tool {tool_name} is temporarily unavailable: {e}"
+            except Exception as e:
+                return f"Error calling tool {tool_name}: {str(e)}"
+        return call_tool
+
+    server_tools = []
+    for tool in tools_list:
+        tool_name = tool.name if hasattr(tool, 'name') else str(tool)
+        tool_description = tool.description if hasattr(tool, 'description') else f"Tool: {tool_name}"
+        args_schema = getattr(tool, 'inputSchema', None) or {"type": "object", "properties": {}}
+        
+        # Create LangChain tool
+        langchain_tool = StructuredTool.from_function(
+            coroutine=make_tool_coroutine(tool_name),
+            name=tool_name,
+            description=tool_description or f"Tool: {tool_name}",
+            args_schema=args_schema,
+        )
+        server_tools.append(langchain_tool)
+    return server_tools
+
+
+# Listed tools and their LangChain wrappers per server, refreshed on
+# tools/list_changed notifications or after MCP_TOOL_CATALOG_TTL seconds.
+tool_catalog = ToolCatalog(
+    session_manager,
+    build_langchain_tools,
+    ttl=float(os.getenv("MCP_TOOL_CATALOG_TTL", "300")),
+)
+
+
+def make_mcp_client(server_id: str, record: Dict[str, Any], token_storage) -> Client:
+    """Builds this worker's FastMCP client for a registered server."""
+    oauth = OAuth(record["server_url"])
+    # OAuth tokens live in Redis, so a worker that didn't run the flow can still connect.
+    oauth.context.storage = token_storage
+    # The catalog's handler refreshes cached tools when the server announces a change.
+    return Client(record["server_url"], auth=oauth, message_handler=tool_catalog.message_handler(server_id))
+
+
+async def forget_server_locally(server_id: str):
+    """Closes this worker's session for a server and drops its cached tools."""
+    await session_manager.close(server_id)
+    tool_catalog.forget(server_id)
+    call_limiter.forget(server_id)
+    tool_results.invalidate_server(server_id)
+
+
+# Authenticated servers, shared by every worker through Redis. Each worker
+# builds its own client for a server the first time it needs one.
+redis_client = redis.asyncio.from_url(os.getenv("REDIS_URL"))
+server_registry = ServerRegistry(
+    redis_client,
+    make_mcp_client,
+    on_forget=forget_server_locally,
+)
+
+
+# Model clients and compiled agent graphs, shared across chat requests.
+agent_cache = AgentCache(max_agents=int(os.getenv("AGENT_CACHE_SIZE", "32")))
+
+XAI_MODEL_KEY = ("xai", "grok-2", 0.7)
+GEMINI_CLIENT_KEY = ("gemini-client",)
+
+
+def get_xai_model() -> ChatXAI:
+    return agent_cache.model(XAI_MODEL_KEY, lambda: ChatXAI(
+        model="grok-2",
+        xai_api_key=os.getenv("XAI_API_KEY"),
+        temperature=0.7
+    ))
+
+
+def get_gemini_client() -> genai.Client:
+    return agent_cache.model(GEMINI_CLIENT_KEY, lambda: genai.Client(api_key=os.getenv("GEMINI_API_KEY")))
+
+
+# Opt-in cache of read-only tool results (tools listed with readOnlyHint, which
+# the gateway sets on GET operations); any other call clears its server's entries.
+tool_results = ToolResultCache(
+    maxsize=int(os.getenv("MCP_TOOL_RESULT_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("MCP_TOOL_RESULT_CACHE_TTL", "30")),
+    max_bytes=int(os.getenv("MCP_TOOL_RESULT_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+    enabled=os.getenv("MCP_TOOL_RESULT_CACHE", "false").lower() in ("1", "true", "yes", "on"),
+)
+
+
+async def result_cache_principal(server_id: str) -> str:
+    """
+    Whose view of the server a cached result is: a hash of the OAuth access
+    token it is fetched with. Registrations are shared by every caller and
+    workers, so the server_id alone doesn't say which login produced a result.
+    """
+    tokens = await server_registry.token_storage(server_id).get_tokens()
+    if tokens is None:
+        return "anonymous"
+    return hashlib.sha256(tokens.access_token.encode()).hexdigest()
+
+
+async def call_server_tool(server_id: str, client: Client, tool_name: str, arguments: Dict[str, Any]):
+    """
+    Calls a tool through the server's call slots and shared session, serving
+    read-only tools from the result cache when it is enabled.
+    """
+    read_only = tool_results.enabled and tool_catalog.is_read_only(server_id, tool_name)
+    if read_only:
+        # Scoped to the token, so a result is only reused for calls made with the same credentials.
+        key = ToolResultCache.key(server_id, tool_name, arguments, principal=await result_cache_principal(server_id))
+        cached = tool_results.get(key)
+        if cached is not None:
+            return cached
+        generation = tool_results.generation(server_id)
+
+    try:
+        async with call_limiter.slot(server_id):
+            async with session_manager.session(server_id, client) as session_client:
+                result = await session_client.call_tool(tool_name, arguments)
+    finally:
+        if tool_results.enabled and not read_only:
+            # May have changed what the server's read-only tools return, even if it failed.
+            tool_results.invalidate_server(server_id)
+
+    if read_only and not result.is_error:
+        tool_results.put(key, result, len(repr(result)), generation)
+    return result
+
+
+SUMMARY_INSTRUCTIONS = (
+    "Summarize the conversation so far for an assistant that will continue it. "
+    "Keep names, IDs, numbers, decisions and open requests; drop pleasantries. "
+    "Reply with the summary only."
+)
+
+
+def summary_prompt(previous_summary: str, messages: list) -> str:
+    lines = [f"{'User' if msg.get('role') == 'user' else 'Assistant'}: {msg.get('content', '')}" for msg in messages]
+    previous = f"Summary so far:\n{previous_summary}\n\n" if previous_summary else ""
+    return f"{SUMMARY_INSTRUCTIONS}\n\n{previous}New messages:\n" + "\n".join(lines)
+
+
+async def summarize_with_grok(previous_summary: str, messages: list) -> str:
+    response = await get_xai_model().ainvoke(summary_prompt(previous_summary, messages))
+    return message_text(response.content)
+
+
+async def summarize_with_gemini(previous_summary: str, messages: list) -> str:
+    response = await get_gemini_client().aio.models.generate_content(
+        model="models/gemini-1.5-flash",
+        contents=summary_prompt(previous_summary, messages),
+    )
+    return response.text or ""
+
+
+# Recent messages go to the model verbatim; older ones as a rolling summary cached in Redis per conversation.
+HISTORY_SETTINGS = dict(
+    keep_recent=int(os.getenv("CHAT_HISTORY_KEEP_RECENT", "8")),
+    fold_every=int(os.getenv("CHAT_HISTORY_FOLD_EVERY", "6")),
+    max_message_chars=int(os.getenv("CHAT_HISTORY_MAX_MESSAGE_CHARS", "4000")),
+    summary_ttl=int(os.getenv("CHAT_SUMMARY_TTL", str(7 * 24 * 3600))),
+)
+langchain_history = HistoryManager(redis_client, summarize_with_grok, key_prefix="chat:summary:grok", **HISTORY_SETTINGS)
+gemini_history = HistoryManager(redis_client, summarize_with_gemini, key_prefix="chat:summary:gemini", **HISTORY_SETTINGS)
+
+
+@app.after_serving
+async def close_mcp_sessions():
+    await session_manager.close_all()
+
+
 # 2. Make the route asynchronous with 'async def'
 @app.route("/api/mcp/start-auth", methods=["POST"])
 async def authenticate_mcp_server():
@@ -55,20 +264,27 @@ async def authenticate_mcp_server():
         return jsonify({"success": False, "message": "url is required"}), 400
 
     try:
-        client = Client(server_url, auth="oauth")
-
-        async with client:
-            await client.ping()
-        
         server_id = str(uuid.uuid4())
-        authenticated_clients[server_id] = {
-            "client": client,
+        record = {
             "server_url": server_url,
             "server_name": server_name,
             "authenticated_at": "now",
-            "auth_headers": getattr(client, '_auth_headers', {}),  # Store auth headers if available
-            "auth_token": getattr(client, '_auth_token', None)     # Store auth token if available
         }
+        client = server_registry.build_client(server_id, record)
+
+        # Opening the managed session runs the OAuth flow; the session then
+        # stays open for every later request to this server.
+        try:
+            async with session_manager.session(server_id, client) as session_client:
+                await session_client.ping()
+        except Exception:
+            await session_manager.close(server_id)
+            raise
+        
+        # Tokens were saved to Redis by the flow; the record makes the server visible to every worker
+        await server_registry.register(server_id, record, client=client)
+        # Warm the tool catalog so the first chat turn doesn't wait on listing
+        tool_catalog.prefetch(server_id, client)
         return jsonify({"success": True, "server_id": server_id})
 
     except Exception as e:
@@ -79,26 +295,26 @@ async def authenticate_mcp_server():
 async def get_mcp_tools(server_id):
     """Get available tools from an authenticated FastMCP server."""
     try:
-        if server_id not in authenticated_clients:
+        client_info = await server_registry.get(server_id)
+        if client_info is None:
             return jsonify({"error": "FastMCP server not authenticated"}), 401
 
-        client = authenticated_clients[server_id]["client"]
+        client = client_info["client"]
 
-        async with client:
-            tools = await client.list_tools()
-            formatted_tools = []
-            for tool in tools:
-                if hasattr(tool, 'dict'):
-                    tool_data = tool.dict()
-                else:
-                    tool_data = {"name": str(tool), "description": ""}
+        tools = (await tool_catalog.get(server_id, client)).tools
+        formatted_tools = []
+        for tool in tools:
+            if hasattr(tool, 'dict'):
+                tool_data = tool.dict()
+            else:
+                tool_data = {"name": str(tool), "description": ""}
 
-                formatted_tools.append({
-                    "name": tool_data.get("name", str(tool)),
-                    "description": tool_data.get("description", ""),
-                    "inputSchema": tool_data.get("inputSchema", {})
-                })
-            return jsonify({"tools": formatted_tools})
+            formatted_tools.append({
+                "name": tool_data.get("name", str(tool)),
+                "description": tool_data.get("description", ""),
+                "inputSchema": tool_data.get("inputSchema", {})
+            })
+        return jsonify({"tools": formatted_tools})
 
     except Exception as e:
         logger.error(f"Error fetching tools: {e}")
@@ -108,7 +324,8 @@ async def get_mcp_tools(server_id):
 async def call_mcp_tool(server_id):
     """Call a tool on an authenticated FastMCP server."""
     try:
-        if server_id not in authenticated_clients:
+        client_info = await server_registry.get(server_id)
+        if client_info is None:
             return jsonify({"success": False, "error": "Server not authenticated"}), 401
 
         data = await request.get_json()
@@ -118,11 +335,14 @@ async def call_mcp_tool(server_id):
         if not tool_name:
             return jsonify({"success": False, "error": "tool_name is required"}), 400
 
-        client = authenticated_clients[server_id]["client"]
+        client = client_info["client"]
+
+        result = await call_server_tool(server_id, client, tool_name, arguments)
+        return jsonify({"success": True, "result": result.dict() if hasattr(result, 'dict') else str(result)})
 
-        async with client:
-            result = await client.call_tool(tool_name, arguments)
-            return jsonify({"success": True, "result": result.dict() if hasattr(result, 'dict') else str(result)})
+    except ServerSaturated as e:
+        logger.warning(str(e))
+        return jsonify({"success": False, "error": str(e), "retry_after": e.retry_after}), 429, {"Retry-After": str(e.retry_after)}
 
     except Exception as e:
         logger.error(f"Error calling tool {tool_name}: {e}")
@@ -133,7 +353,7 @@ async def list_authenticated_servers():
     """List all authenticated FastMCP servers."""
     try:
         servers = []
-        for server_id, client_info in authenticated_clients.items():
+        for server_id, client_info in await server_registry.items():
             servers.append({
                 "id": server_id,
                 "server_id": server_id,  # Keep both for compatibility
@@ -158,18 +378,19 @@ async def list_authenticated_servers():
 async def ping_mcp_server(server_id):
     """Ping an MCP server to check connection status."""
     try:
-        if server_id not in authenticated_clients:
+        client_info = await server_registry.get(server_id)
+        if client_info is None:
             return jsonify({"connected": False, "error": "Server not authenticated"}), 404
 
-        client = authenticated_clients[server_id]["client"]
+        client = client_info["client"]
 
-        async with client:
-            try:
+        try:
+            async with session_manager.session(server_id, client) as client:
                 await client.ping()
                 return jsonify({"connected": True})
-            except Exception as e:
-                logger.error(f"Ping failed for server {server_id}: {e}")
-                return jsonify({"connected": False})
+        except Exception as e:
+            logger.error(f"Ping failed for server {server_id}: {e}")
+            return jsonify({"connected": False})
 
     except Exception as e:
         logger.error(f"Error in ping_mcp_server: {e}")
@@ -179,20 +400,11 @@ async def ping_mcp_server(server_id):
 async def disconnect_mcp_server(server_id):
     """Disconnect from an MCP server."""
     try:
-        if server_id not in authenticated_clients:
+        # Unregisters it for every worker; this worker's session and cached
+        # tools are dropped now, other workers' on their next lookup
+        if not await server_registry.remove(server_id):
             return jsonify({"error": "Server not found"}), 404
 
-        client_info = authenticated_clients[server_id]
-        client = client_info["client"]
-
-        # Close client connection if it has a close method
-        if hasattr(client, 'close'):
-            async with client:
-                await client.close()
-
-        # Remove from authenticated clients
-        del authenticated_clients[server_id]
-
         return jsonify({
             "status": "disconnected",
             "message": f"Server {server_id} disconnected successfully"
@@ -202,6 +414,128 @@ async def disconnect_mcp_server(server_id):
         logger.error(f"Error in disconnect_mcp_server: {e}")
         return jsonify({"error": str(e)}), 500
 
+# Seconds a chat turn waits on any one server's tool loading.
+TOOL_LOAD_DEADLINE = float(os.getenv("MCP_TOOL_LOAD_DEADLINE", "5"))
+
+
+async def load_server_tools(server_id: str, client_info: Dict[str, Any], deadline: float):
+    """
+    Loads one server's catalog entry within `deadline` seconds.
+    Returns (server_name, catalog_entry_or_None, elapsed_seconds, error_or_None).
+    """
+    server_name = client_info.get("server_name", "Unknown")
+    logger.info(f"[v0] Loading tools from {server_name} using authenticated FastMCP client")
+    start = time.perf_counter()
+    try:
+        # Shielded so a missed deadline doesn't cancel the shared catalog refresh;
+        # it keeps running and the next turn picks up its result.
+        catalog_entry = await asyncio.wait_for(
+            asyncio.shield(tool_catalog.get(server_id, server_registry.client(server_id, client_info))),
+            timeout=deadline,
+        )
+    except asyncio.TimeoutError:
+        elapsed = time.perf_counter() - start
+        logger.warning(f"[v0] Tool loading for {server_name} missed the {deadline}s deadline")
+        return server_name, None, elapsed, f"timed out after {deadline}s"
+    except Exception as e:
+        elapsed = time.perf_counter() - start
+        logger.error(f"[v0] Failed to load tools from {server_name}: {e}")
+        return server_name, None, elapsed, str(e)
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"[v0] Loaded {len(catalog_entry.langchain_tools)} tools for {server_name} in {elapsed * 1000:.0f} ms (catalog v{catalog_entry.version})")
+    return server_name, catalog_entry, elapsed, None
+
+
+async def prepare_langchain_turn(messages: list, conversation_id: Optional[str] = None):
+    """
+    Loads every server's tools, fetches the cached agent for them and converts
+    the compacted chat history. Returns (agent, langchain_messages, response_metadata).
+    """
+    server_items = await server_registry.items()
+    logger.info(f"[v0] Starting LangChain chat with {len(server_items)} authenticated MCP servers")
+    
+    all_tools = []
+    successful_servers = []
+    failed_servers = []
+    server_load_times = {}
+    tool_versions = []
+
+    # Load every server's tools concurrently; a server that misses the
+    # deadline is reported as failed instead of stalling the turn.
+    load_results = await asyncio.gather(*(
+        load_server_tools(server_id, client_info, TOOL_LOAD_DEADLINE)
+        for server_id, client_info in server_items
+    ))
+    for (server_id, _), (server_name, catalog_entry, elapsed, error) in zip(server_items, load_results):
+        # Keyed by server_id: display names aren't unique.
+        server_load_times[server_id] = {"name": server_name, "ms": round(elapsed * 1000, 1)}
+        if error:
+            failed_servers.append(f"{server_name}: {error}")
+            continue
+        all_tools.extend(catalog_entry.langchain_tools)
+        successful_servers.append(server_name)
+        tool_versions.append((server_id, catalog_entry.version))
+
+    logger.info(f"[v0] Creating agent with {len(all_tools)} tools using authenticated FastMCP clients")
+    
+    # Reuses the compiled graph until a server's tool catalog version changes
+    model = get_xai_model()
+    agent = agent_cache.agent(
+        XAI_MODEL_KEY,
+        tuple(sorted(tool_versions)),
+        lambda: create_react_agent(model, all_tools),
+    )
+    
+    # Convert messages to LangChain format, with older turns folded into a summary
+    history = await langchain_history.compact(conversation_id, messages)
+    langchain_messages = []
+    if history.summary:
+        langchain_messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{history.summary}"})
+    for msg in history.messages:
+        if msg.get("role") == "user":
+            langchain_messages.append({"role": "human", "content": msg.get("content", "")})
+        elif msg.get("role") == "assistant":
+            langchain_messages.append({"role": "ai", "content": msg.get("content", "")})
+    
+    prompt_chars = sum(len(msg["content"]) for msg in langchain_messages)
+    langchain_history.record_prompt(prompt_chars)
+    logger.info(f"[v0] Invoking agent with {len(all_tools)} MCP tools: {[tool.name for tool in all_tools]}")
+
+    metadata = {
+        "prompt_chars": prompt_chars,
+        "summarized_messages": history.summarized_count,
+        "dropped_messages": history.dropped_count,
+        "tools_loaded": len(all_tools),
+        "successful_servers": successful_servers,
+        "failed_servers": failed_servers,
+        "server_load_times_ms": server_load_times,
+        "model": "grok-2"
+    }
+    return agent, langchain_messages, metadata
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Formats one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def sse_response(events) -> Response:
+    # X-Accel-Buffering stops nginx-style proxies from holding back the stream.
+    response = Response(events, mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    response.timeout = None
+    return response
+
+
+def message_text(content: Any) -> str:
+    """Flattens a LangChain message's content, which may be a list of parts."""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content or ""
+
+
 @app.route("/api/chat/langchain", methods=["POST"])
 async def chat_with_langchain():
     """Chat endpoint using LangChain orchestration with MCP tools and Grok."""
@@ -212,76 +546,7 @@ async def chat_with_langchain():
         if not messages:
             return jsonify({"error": "Messages are required"}), 400
 
-        logger.info(f"[v0] Starting LangChain chat with {len(authenticated_clients)} authenticated MCP servers")
-        
-        all_tools = []
-        successful_servers = []
-        failed_servers = []
-        
-        for server_id, client_info in authenticated_clients.items():
-            server_url = client_info["server_url"]
-            server_name = client_info.get("server_name", "Unknown")
-            
-            logger.info(f"[v0] Loading tools from {server_name} using authenticated FastMCP client")
-            
-            try:
-                client = client_info["client"]
-                
-                async with client:
-                    # Get tools directly from FastMCP client
-                    tools_list = await client.list_tools()
-                    logger.info(f"[v0] FastMCP client returned {len(tools_list)} tools from {server_name}")
-                    
-                    # Convert FastMCP tools to LangChain tools manually since we can't use streamable client
-                    server_tools = []
-                    for tool in tools_list:
-                        tool_name = tool.name if hasattr(tool, 'name') else str(tool)
-                        tool_description = tool.description if hasattr(tool, 'description') else f"Tool: {tool_name}"
-                        
-                        # Create a wrapper function for the tool
-                        async def tool_wrapper(tool_name=tool_name, **kwargs):
-                            try:
-                                result = await client.call_tool(tool_name, kwargs)
-                                return str(result)
-                            except Exception as e:
-                                return f"Error calling tool {tool_name}: {str(e)}"
-                        
-                        # Create LangChain tool
-                        langchain_tool = Tool(
-                            name=tool_name,
-                            description=tool_description,
-                            func=tool_wrapper
-                        )
-                        server_tools.append(langchain_tool)
-                    
-                    logger.info(f"[v0] Converted {len(server_tools)} FastMCP tools to LangChain format for {server_name}")
-                    all_tools.extend(server_tools)
-                    successful_servers.append(server_name)
-                        
-            except Exception as e:
-                logger.error(f"[v0] Failed to load tools from {server_name}: {e}")
-                failed_servers.append(f"{server_name}: {str(e)}")
-                continue
-
-        logger.info(f"[v0] Creating agent with {len(all_tools)} tools using authenticated FastMCP clients")
-        
-        model = ChatXAI(
-            model="grok-2",
-            xai_api_key=os.getenv("XAI_API_KEY"),
-            temperature=0.7
-        )
-        
-        agent = create_react_agent(model, all_tools)
-        
-        # Convert messages to LangChain format
-        langchain_messages = []
-        for msg in messages:
-            if msg.get("role") == "user":
-                langchain_messages.append({"role": "human", "content": msg.get("content", "")})
-            elif msg.get("role") == "assistant":
-                langchain_messages.append({"role": "ai", "content": msg.get("content", "")})
-        
-        logger.info(f"[v0] Invoking agent with {len(all_tools)} MCP tools: {[tool.name for tool in all_tools]}")
+        agent, langchain_messages, metadata = await prepare_langchain_turn(messages, data.get("conversation_id"))
         
         response = await agent.ainvoke({"messages": langchain_messages})
         
@@ -303,21 +568,120 @@ async def chat_with_langchain():
         return jsonify({
             "success": True,
             "response": response_content,
-            "tools_loaded": len(all_tools),
-            "successful_servers": successful_servers,
-            "failed_servers": failed_servers,
-            "model": "grok-2"
+            **metadata
         })
 
     except Exception as e:
         logger.error(f"[v0] Error in LangChain chat: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+
+@app.route("/api/chat/langchain/stream", methods=["POST"])
+async def stream_chat_with_langchain():
+    """
+    Streaming variant of /api/chat/langchain. Emits Server-Sent Events:
+    `metadata` once tools are loaded, `token` for each LLM token,
+    `tool_start` / `tool_end` around each tool call, then `final` with the
+    full answer (or `error`).
+    """
+    data = await request.get_json()
+    messages = data.get("messages", [])
+    
+    if not messages:
+        return jsonify({"error": "Messages are required"}), 400
+
+    async def events():
+        try:
+            agent, langchain_messages, metadata = await prepare_langchain_turn(messages, data.get("conversation_id"))
+            yield sse_event("metadata", metadata)
+
+            started = time.perf_counter()
+            first_token_ms = None
+            final_content = ""
+            async for event in agent.astream_events({"messages": langchain_messages}, version="v2"):
+                kind = event["event"]
+                if kind == "on_chat_model_stream":
+                    token = message_text(event["data"]["chunk"].content)
+                    if token:
+                        if first_token_ms is None:
+                            first_token_ms = round((time.perf_counter() - started) * 1000, 1)
+                        yield sse_event("token", {"content": token})
+                elif kind == "on_tool_start":
+                    yield sse_event("tool_start", {"name": event["name"], "run_id": event["run_id"], "input": event["data"].get("input")})
+                elif kind == "on_tool_end":
+                    yield sse_event("tool_end", {"name": event["name"], "run_id": event["run_id"], "output": str(event["data"].get("output"))})
+                elif kind == "on_chain_end" and event["name"] == "LangGraph":
+                    output_messages = (event["data"].get("output") or {}).get("messages") or []
+                    if output_messages:
+                        final_content = message_text(getattr(output_messages[-1], "content", ""))
+
+            logger.info(f"[v0] Streamed agent response: {final_content[:100]}...")
+            yield sse_event("final", {
+                "success": True,
+                "response": final_content,
+                "first_token_ms": first_token_ms,
+                "total_ms": round((time.perf_counter() - started) * 1000, 1),
+            })
+
+        except Exception as e:
+            logger.error(f"[v0] Error in streaming LangChain chat: {e}")
+            yield sse_event("error", {"success": False, "error": str(e)})
+
+    return sse_response(events())
+
+
+async def prepare_gemini_turn(messages: list, conversation_id: Optional[str] = None):
+    """
+    Wraps every server whose tools load within the deadline as a Gemini MCP
+    tool and formats the prompt from the compacted history.
+    Returns (mcp_sessions, full_prompt, successful_servers).
+    """
+    server_items = await server_registry.items()
+    logger.info(f"[v0] Starting Gemini chat with {len(server_items)} registered servers")
+    
+    # 1. Load every server's tools concurrently; one slow or broken server is
+    # left out of the turn rather than failing it.
+    load_results = await asyncio.gather(*(
+        load_server_tools(server_id, client_info, TOOL_LOAD_DEADLINE)
+        for server_id, client_info in server_items
+    ), return_exceptions=True)
+    mcp_sessions = []
+    successful_servers = []
+    for (server_id, client_info), loaded in zip(server_items, load_results):
+        server_name = client_info.get("server_name", "Unknown")
+        if isinstance(loaded, BaseException):
+            logger.error(f"[v0] Skipping {server_name} for Gemini: {loaded}")
+            continue
+        _, catalog_entry, _, error = loaded
+        if error:
+            logger.warning(f"[v0] Skipping {server_name} for Gemini: {error}")
+            continue
+        # Gemini's tool calls go through the same limiter, session and result cache as LangChain's
+        mcp_sessions.append(GatewaySession(
+            catalog_entry.tools,
+            functools.partial(call_server_tool, server_id, server_registry.client(server_id, client_info)),
+        ))
+        successful_servers.append(server_name)
+    logger.info(f"[v0] Collected {len(mcp_sessions)} MCP sessions")
+
+    # Format conversation history into a single string, with older turns folded into a summary
+    history = await gemini_history.compact(conversation_id, messages)
+    recent = history.messages
+    conversation_history = [f"{'User' if msg.get('role') == 'user' else 'Assistant'}: {msg.get('content', '')}" for msg in recent[:-1]]
+    latest_message = recent[-1].get("content", "") if recent else ""
+    context = "Previous conversation:\n" + "\n".join(conversation_history) + "\n\nCurrent message: " if conversation_history else ""
+    if history.summary:
+        context = f"Summary of the earlier conversation:\n{history.summary}\n\n" + (context or "Current message: ")
+    full_prompt = context + latest_message
+    gemini_history.record_prompt(len(full_prompt))
+    return mcp_sessions, full_prompt, successful_servers
+
+
 @app.route("/api/chat/gemini", methods=["POST"])
 async def chat_with_gemini():
     """
     Chat endpoint using the genai.Client pattern with in-memory FastMCP clients,
-    correctly managing concurrent connections with TaskGroup.
+    borrowing each server's long-lived session from the session manager.
     """
     try:
         data = await request.get_json()
@@ -326,55 +690,19 @@ async def chat_with_gemini():
         if not messages:
             return jsonify({"error": "Messages are required"}), 400
 
-        logger.info(f"[v0] Starting Gemini chat with {len(authenticated_clients)} in-memory servers")
-        
-        # 1. Create a list of the client objects from your dictionary
-        mcp_clients = [info["client"] for info in authenticated_clients.values()]
-        
-        mcp_sessions = []
-        successful_servers = []
-        
-        # 2. Use a TaskGroup to manage all client connections simultaneously
-        async with asyncio.TaskGroup() as tg:
-            
-            # --- THIS IS THE CORRECTED LOGIC ---
-            # Create a list to hold the tasks
-            connection_tasks = []
-            for client in mcp_clients:
-                # Start each client's context manager and add the task to our list
-                task = tg.create_task(client.__aenter__())
-                connection_tasks.append(task)
-            
-            # Wait for all connection tasks to complete
-            await asyncio.gather(*connection_tasks)
-            
-            # Now that all connections are guaranteed to be OPEN, collect the sessions
-            for client in mcp_clients:
-                mcp_sessions.append(client.session)
-            
-            successful_servers = [info.get("server_name", "Unknown") for info in authenticated_clients.values()]
-            logger.info(f"[v0] Collected {len(mcp_sessions)} MCP sessions")
-
-            # 3. Configure and call Gemini while the connections are open
-            gemini_client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-
-            # Format conversation history into a single string
-            conversation_history = [f"{'User' if msg.get('role') == 'user' else 'Assistant'}: {msg.get('content', '')}" for msg in messages[:-1]]
-            latest_message = messages[-1].get("content", "") if messages else ""
-            context = "Previous conversation:\n" + "\n".join(conversation_history) + "\n\nCurrent message: " if conversation_history else ""
-            full_prompt = context + latest_message
-
-            response = await gemini_client.aio.models.generate_content(
-                model="models/gemini-1.5-flash",
-                contents=full_prompt,
-                config=genai.types.GenerateContentConfig(
-                    temperature=0,
-                    tools=mcp_sessions,  # Pass the FastMCP client session
-                ),
-            )
-            
-            # The TaskGroup will automatically close all client connections
-            # when this 'async with' block exits.
+        mcp_sessions, full_prompt, successful_servers = await prepare_gemini_turn(messages, data.get("conversation_id"))
+
+        # 2. Call Gemini with the shared client; the sessions stay open after this request
+        gemini_client = get_gemini_client()
+
+        response = await gemini_client.aio.models.generate_content(
+            model="models/gemini-1.5-flash",
+            contents=full_prompt,
+            config=genai.types.GenerateContentConfig(
+                temperature=0,
+                tools=mcp_sessions,  # Gateway sessions over each server's shared MCP session
+            ),
+        )
 
         response_text = response.text if hasattr(response, 'text') else str(response)
         logger.info(f"[v0] Gemini response: {response_text[:100]}...")
@@ -384,6 +712,7 @@ async def chat_with_gemini():
             "response": response_text,
             "mcp_tools": len(mcp_sessions),
             "successful_servers": successful_servers,
+            "prompt_chars": len(full_prompt),
             "model": "gemini-1.5-flash"
         })
 
@@ -392,6 +721,91 @@ async def chat_with_gemini():
         import traceback
         logger.error(f"[v0] Full traceback: {traceback.format_exc()}")
         return jsonify({"success": False, "error": str(e)}), 500
+
+
+@app.route("/api/chat/gemini/stream", methods=["POST"])
+async def stream_chat_with_gemini():
+    """
+    Streaming variant of /api/chat/gemini. Emits `metadata`, then `token`
+    events as Gemini produces text, `tool_start` for each function call it
+    makes, and finally `final` (or `error`).
+    """
+    data = await request.get_json()
+    messages = data.get("messages", [])
     
+    if not messages:
+        return jsonify({"error": "Messages are required"}), 400
+
+    async def events():
+        try:
+            mcp_sessions, full_prompt, successful_servers = await prepare_gemini_turn(messages, data.get("conversation_id"))
+            yield sse_event("metadata", {
+                "mcp_tools": len(mcp_sessions),
+                "successful_servers": successful_servers,
+                "prompt_chars": len(full_prompt),
+                "model": "gemini-1.5-flash"
+            })
+
+            gemini_client = get_gemini_client()
+            started = time.perf_counter()
+            first_token_ms = None
+            response_text = ""
+            stream = await gemini_client.aio.models.generate_content_stream(
+                model="models/gemini-1.5-flash",
+                contents=full_prompt,
+                config=genai.types.GenerateContentConfig(
+                    temperature=0,
+                    tools=mcp_sessions,
+                ),
+            )
+            async for chunk in stream:
+                for function_call in chunk.function_calls or []:
+                    yield sse_event("tool_start", {"name": function_call.name, "input": function_call.args})
+                if chunk.text:
+                    if first_token_ms is None:
+                        first_token_ms = round((time.perf_counter() - started) * 1000, 1)
+                    response_text += chunk.text
+                    yield sse_event("token", {"content": chunk.text})
+
+            logger.info(f"[v0] Streamed Gemini response: {response_text[:100]}...")
+            yield sse_event("final", {
+                "success": True,
+                "response": response_text,
+                "first_token_ms": first_token_ms,
+                "total_ms": round((time.perf_counter() - started) * 1000, 1),
+            })
+
+        except Exception as e:
+            logger.error(f"[v0] Error in streaming Gemini chat: {e}")
+            yield sse_event("error", {"success": False, "error": str(e)})
+
+    return sse_response(events())
+
+
+@app.route("/api/metrics/mcp-servers", methods=["GET"])
+async def mcp_server_metrics():
+    """Per-server call queue depth, wait times and rejections, plus session health."""
+    return jsonify({
+        "calls": call_limiter.stats(),
+        "sessions": session_manager.stats(),
+        "tool_results": tool_results.stats(),
+    })
+
+
+@app.route("/api/metrics/history", methods=["GET"])
+async def history_metrics():
+    """Prompt size per turn and how often history was folded into a summary."""
+    return jsonify({
+        "langchain": langchain_history.stats(),
+        "gemini": gemini_history.stats(),
+    })
+
+
+@app.route("/api/metrics/agents", methods=["GET"])
+async def agent_cache_metrics():
+    """Model client and agent graph build counts, hit rates and build times."""
+    return jsonify(agent_cache.stats())
+
+
 if __name__ == "__main__":
     app.run(debug=True, port=5328, threaded=True)
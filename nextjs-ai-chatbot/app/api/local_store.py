@@ -0,0 +1,34 @@
+from typing import Dict
+
+
+class LocalStore:
+    """
+    The handful of redis.asyncio commands the registry and history use, kept
+    in process. For single-worker runs and the offline load test; nothing is
+    shared between workers.
+    """
+    def __init__(self):
+        self._values: Dict[str, str] = {}
+        self._sets: Dict[str, set] = {}
+
+    async def get(self, key):
+        return self._values.get(key)
+
+    async def mget(self, keys):
+        return [self._values.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None):
+        # Expiry isn't needed for a store that lives as long as the process.
+        self._values[key] = value
+
+    async def delete(self, *keys):
+        return sum(self._values.pop(key, None) is not None for key in keys)
+
+    async def sadd(self, key, member):
+        self._sets.setdefault(key, set()).add(member)
+
+    async def srem(self, key, member):
+        self._sets.get(key, set()).discard(member)
+
+    async def smembers(self, key):
+        return set(self._sets.get(key, set()))
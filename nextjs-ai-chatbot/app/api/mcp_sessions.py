@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict
+
+from fastmcp import Client
+from fastmcp.exceptions import ToolError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _ManagedSession:
+    client: Client
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    connected: bool = False
+    last_ok: float = 0.0
+    reconnects: int = 0
+    # Requests currently inside `session()`; a reconnect waits until this is 0.
+    borrowers: int = 0
+    idle: asyncio.Event = field(default_factory=asyncio.Event)
+    # Set while a reconnect waits for borrowers to finish, so no new ones start.
+    draining: bool = False
+
+    def __post_init__(self):
+        self.idle.set()
+
+
+class MCPSessionManager:
+    """
+    Keeps one long-lived MCP session open per server_id instead of opening
+    and tearing one down (initialize handshake, OAuth headers and all) on
+    every request.
+
+    The manager holds a reference on each FastMCP client's reentrant
+    context, so the session stays up between requests and concurrent
+    requests share it. A session that has been idle longer than
+    `health_check_interval` is pinged before use, and one that fails the
+    ping, or whose last call failed outside the tool itself, is reconnected
+    lazily on next use. A reconnect waits for requests already using the
+    session to finish, so it never pulls the session out from under them.
+    """
+    def __init__(self, health_check_interval: float = 30.0):
+        self.health_check_interval = health_check_interval
+        self._sessions: Dict[str, _ManagedSession] = {}
+
+    def _managed(self, server_id: str, client: Client) -> _ManagedSession:
+        managed = self._sessions.get(server_id)
+        if managed is not None and managed.client is not client:
+            if managed.connected or managed.borrowers:
+                # Swapping here would orphan the open session and its borrowers.
+                raise ValueError(
+                    f"MCP session for {server_id} belongs to a different client; close it before using a new one"
+                )
+            managed = None
+        if managed is None:
+            managed = self._sessions[server_id] = _ManagedSession(client)
+        return managed
+
+    def _is_fresh(self, managed: _ManagedSession) -> bool:
+        return (
+            not managed.draining
+            and managed.connected
+            and managed.client.is_connected()
+            and time.monotonic() - managed.last_ok < self.health_check_interval
+        )
+
+    async def _open(self, managed: _ManagedSession):
+        if managed.connected:
+            # Let requests already using the broken session finish (or fail)
+            # on their own before it is dropped; new ones wait on the lock.
+            managed.draining = True
+            try:
+                await managed.idle.wait()
+            finally:
+                managed.draining = False
+            managed.connected = False
+            managed.reconnects += 1
+            try:
+                # Nobody borrows the session now, so closing it only drops our own reference.
+                await managed.client.close()
+            except Exception as e:
+                logger.debug(f"Ignoring error while closing stale MCP session: {e}")
+        await managed.client.__aenter__()
+        managed.connected = True
+        managed.last_ok = time.monotonic()
+
+    async def get(self, server_id: str, client: Client) -> Client:
+        """
+        Returns `client` with a live session, connecting, health-checking or
+        reconnecting it first as needed.
+        """
+        managed = self._managed(server_id, client)
+        if self._is_fresh(managed):
+            return client
+
+        async with managed.lock:
+            # Another request may have connected or checked it while we waited.
+            if self._is_fresh(managed):
+                return client
+            if managed.connected and client.is_connected():
+                try:
+                    await client.ping()
+                    managed.last_ok = time.monotonic()
+                    return client
+                except Exception as e:
+                    logger.warning(f"Health check failed for MCP server {server_id}, reconnecting: {e}")
+            await self._open(managed)
+        return client
+
+    @asynccontextmanager
+    async def session(self, server_id: str, client: Client) -> AsyncIterator[Client]:
+        """
+        Drop-in replacement for `async with client:` that borrows the shared
+        session instead of opening a new one.
+        """
+        managed = self._managed(server_id, client)
+        connected_client = await self.get(server_id, client)
+        managed.borrowers += 1
+        managed.idle.clear()
+        try:
+            yield connected_client
+        except ToolError:
+            # The tool failed, not the session.
+            raise
+        except Exception:
+            # Anything else may mean a dead session: force a health check next time.
+            managed.last_ok = 0.0
+            raise
+        else:
+            managed.last_ok = time.monotonic()
+        finally:
+            managed.borrowers -= 1
+            if managed.borrowers == 0:
+                managed.idle.set()
+
+    async def close(self, server_id: str):
+        """
+        Closes and forgets the session for one server, e.g. when it is
+        disconnected. Unlike a reconnect, this doesn't wait for borrowers.
+        """
+        managed = self._sessions.pop(server_id, None)
+        if managed is not None and managed.connected:
+            await managed.client.close()
+
+    async def close_all(self):
+        for server_id in list(self._sessions):
+            try:
+                await self.close(server_id)
+            except Exception as e:
+                logger.error(f"Error closing MCP session for {server_id}: {e}")
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        now = time.monotonic()
+        return {
+            server_id: {
+                "connected": managed.connected,
+                "idle_seconds": now - managed.last_ok if managed.last_ok else None,
+                "reconnects": managed.reconnects,
+                "borrowers": managed.borrowers,
+            }
+            for server_id, managed in self._sessions.items()
+        }
@@ -0,0 +1,156 @@
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastmcp import Client
+from mcp.client.auth import TokenStorage
+from mcp.shared.auth import OAuthClientInformationFull, OAuthToken
+
+from app.api.local_store import LocalStore
+
+logger = logging.getLogger(__name__)
+
+# Builds a worker-local client for a registered server from its record.
+ClientFactory = Callable[[str, Dict[str, Any], TokenStorage], Client]
+
+
+def _text(value) -> Optional[str]:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class RedisTokenStorage(TokenStorage):
+    """
+    OAuth tokens and client registration for one server, kept in Redis so
+    every worker's client for that server uses the same credentials.
+    """
+    def __init__(self, redis, key_prefix: str):
+        self._redis = redis
+        self._tokens_key = f"{key_prefix}:tokens"
+        self._client_info_key = f"{key_prefix}:client_info"
+
+    async def get_tokens(self) -> Optional[OAuthToken]:
+        raw = _text(await self._redis.get(self._tokens_key))
+        return OAuthToken.model_validate_json(raw) if raw else None
+
+    async def set_tokens(self, tokens: OAuthToken) -> None:
+        await self._redis.set(self._tokens_key, tokens.model_dump_json())
+
+    async def get_client_info(self) -> Optional[OAuthClientInformationFull]:
+        raw = _text(await self._redis.get(self._client_info_key))
+        return OAuthClientInformationFull.model_validate_json(raw) if raw else None
+
+    async def set_client_info(self, client_info: OAuthClientInformationFull) -> None:
+        await self._redis.set(self._client_info_key, client_info.model_dump_json())
+
+
+class ServerRegistry:
+    """
+    The set of authenticated MCP servers, shared by every worker through Redis.
+
+    Each server's record (URL, name, metadata) and OAuth tokens live in Redis;
+    the FastMCP `Client` for it is built lazily, once per worker, the first
+    time that worker serves a request for the server. A server removed on
+    another worker is noticed on the next lookup here, and its local client
+    is dropped through `on_forget`.
+    """
+    def __init__(
+        self,
+        redis,
+        client_factory: ClientFactory,
+        on_forget: Optional[Callable[[str], Awaitable[None]]] = None,
+        key_prefix: str = "mcp:servers",
+    ):
+        """
+        Args:
+            redis: A redis.asyncio client, or None to keep records in this process only.
+            client_factory: Builds a client from `(server_id, record, token_storage)`.
+            on_forget: Awaited with a server_id whose local client is dropped.
+            key_prefix: Prefix of every Redis key the registry writes.
+        """
+        self._redis = redis if redis is not None else LocalStore()
+        self._client_factory = client_factory
+        self._on_forget = on_forget
+        self._key_prefix = key_prefix
+        self._clients: Dict[str, Client] = {}
+
+    def _record_key(self, server_id: str) -> str:
+        return f"{self._key_prefix}:{server_id}"
+
+    @property
+    def _index_key(self) -> str:
+        return f"{self._key_prefix}:index"
+
+    def token_storage(self, server_id: str) -> RedisTokenStorage:
+        return RedisTokenStorage(self._redis, self._record_key(server_id))
+
+    def build_client(self, server_id: str, record: Dict[str, Any]) -> Client:
+        """Builds a client for a server that isn't registered yet, e.g. to run its OAuth flow."""
+        return self._client_factory(server_id, record, self.token_storage(server_id))
+
+    async def register(self, server_id: str, record: Dict[str, Any], client: Optional[Client] = None):
+        """
+        Stores a server's record for every worker. `client`, if given, is
+        kept as this worker's client so it isn't rebuilt.
+        """
+        await self._redis.set(self._record_key(server_id), json.dumps(record))
+        await self._redis.sadd(self._index_key, server_id)
+        if client is not None:
+            self._clients[server_id] = client
+
+    def client(self, server_id: str, record: Dict[str, Any]) -> Client:
+        """This worker's client for a registered server, built on first use."""
+        client = self._clients.get(server_id)
+        if client is None:
+            client = self._clients[server_id] = self.build_client(server_id, record)
+            logger.info(f"Built worker-local client for MCP server {server_id}")
+        return client
+
+    async def _forget_local(self, server_id: str):
+        if self._clients.pop(server_id, None) is not None and self._on_forget is not None:
+            await self._on_forget(server_id)
+
+    async def get(self, server_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the server's record plus this worker's `client`, or None if it isn't registered."""
+        raw = _text(await self._redis.get(self._record_key(server_id)))
+        if raw is None:
+            await self._forget_local(server_id)
+            return None
+        record = json.loads(raw)
+        return {**record, "client": self.client(server_id, record)}
+
+    async def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Every registered server as `(server_id, record)`, without building
+        clients; use `client()` for the servers a caller actually talks to.
+        Local clients of servers no longer registered are dropped here.
+        """
+        server_ids = sorted(_text(member) for member in await self._redis.smembers(self._index_key))
+        for server_id in set(self._clients) - set(server_ids):
+            # Removed by another worker since this one last used it.
+            await self._forget_local(server_id)
+        if not server_ids:
+            return []
+        raws = await self._redis.mget([self._record_key(server_id) for server_id in server_ids])
+
+        entries = []
+        for server_id, raw in zip(server_ids, raws):
+            if raw is None:
+                await self._redis.srem(self._index_key, server_id)
+                await self._forget_local(server_id)
+                continue
+            entries.append((server_id, json.loads(_text(raw))))
+        return entries
+
+    async def remove(self, server_id: str) -> bool:
+        """Unregisters a server for every worker, deleting its record and tokens."""
+        deleted = await self._redis.delete(
+            self._record_key(server_id),
+            f"{self._record_key(server_id)}:tokens",
+            f"{self._record_key(server_id)}:client_info",
+        )
+        await self._redis.srem(self._index_key, server_id)
+        await self._forget_local(server_id)
+        return bool(deleted)
+
+    def local_clients(self) -> Dict[str, Client]:
+        return dict(self._clients)
@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, Optional
+
+import mcp.types
+from fastmcp import Client
+from fastmcp.client.messages import MessageHandler
+
+from app.api.mcp_sessions import MCPSessionManager
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """One server's listed tools and their LangChain wrappers."""
+    tools: List[mcp.types.Tool]
+    langchain_tools: List[Any]
+    version: int
+    fingerprint: str
+    fetched_at: float
+    read_only_tools: FrozenSet[str] = frozenset()
+    # The client the LangChain tools call through; they are rebuilt for a new one.
+    client: Optional[Client] = None
+
+
+def _fingerprint(tools: List[mcp.types.Tool]) -> str:
+    payload = json.dumps(
+        [tool.model_dump(mode="json", exclude_none=True) for tool in tools],
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _read_only_tools(tools: List[mcp.types.Tool]) -> FrozenSet[str]:
+    return frozenset(tool.name for tool in tools if tool.annotations and tool.annotations.readOnlyHint)
+
+
+class ToolCatalog:
+    """
+    Caches each MCP server's tool list, plus the LangChain tools built from
+    it, so a chat turn doesn't list tools and rebuild wrappers every time.
+
+    An entry goes stale after `ttl` seconds or when the server sends a
+    `notifications/tools/list_changed`. A stale entry is still served while
+    a single background task refreshes it, so only a server's very first
+    listing is awaited, and a lookup with a different client than the
+    entry's tools were built for waits for them to be rebuilt. `version`
+    only changes when the listed tools or that client do, and never
+    repeats for a server_id, even across `forget`.
+    """
+    def __init__(
+        self,
+        session_manager: MCPSessionManager,
+        build_langchain_tools: Callable[[str, Client, List[mcp.types.Tool]], List[Any]],
+        ttl: float = 300.0,
+    ):
+        """
+        Args:
+            session_manager: Source of each server's shared MCP session.
+            build_langchain_tools: Converts `(server_id, client, tools)` into LangChain tools.
+            ttl: Seconds before an entry is refreshed even without a notification.
+        """
+        self._session_manager = session_manager
+        self._build_langchain_tools = build_langchain_tools
+        self.ttl = ttl
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._stale: set = set()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._last_version: Dict[str, int] = {}
+
+    def message_handler(self, server_id: str) -> MessageHandler:
+        """Returns a client message handler that invalidates this server's entry on list changes."""
+        catalog = self
+
+        class _CatalogInvalidator(MessageHandler):
+            async def on_tool_list_changed(self, message: mcp.types.ToolListChangedNotification) -> None:
+                logger.info(f"Tool list changed on MCP server {server_id}; refreshing catalog")
+                catalog.invalidate(server_id)
+
+        return _CatalogInvalidator()
+
+    def invalidate(self, server_id: str):
+        """Marks a server's entry stale; the next lookup refreshes it in the background."""
+        self._stale.add(server_id)
+
+    def forget(self, server_id: str):
+        """Drops a server's entry, e.g. when it is disconnected."""
+        self._entries.pop(server_id, None)
+        self._stale.discard(server_id)
+        task = self._refreshing.pop(server_id, None)
+        if task is not None:
+            task.cancel()
+
+    def prefetch(self, server_id: str, client: Client):
+        """Starts listing a server's tools in the background, e.g. right after it connects."""
+        self._refresh_once(server_id, client)
+
+    def peek(self, server_id: str) -> Optional[CatalogEntry]:
+        return self._entries.get(server_id)
+
+    def is_read_only(self, server_id: str, tool_name: str) -> bool:
+        """Whether the server lists the tool with `readOnlyHint`; unknown tools count as mutating."""
+        entry = self._entries.get(server_id)
+        return entry is not None and tool_name in entry.read_only_tools
+
+    async def get(self, server_id: str, client: Client) -> CatalogEntry:
+        """
+        Returns the server's catalog entry. Only waits on the network when the
+        server has never been listed; otherwise a stale entry is returned and
+        refreshed in the background.
+        """
+        entry = self._entries.get(server_id)
+        if entry is None or entry.client is not client:
+            entry = await self._refresh_once(server_id, client)
+            if entry.client is not client:
+                # Joined a refresh that was started with the previous client.
+                entry = await self._refresh_once(server_id, client)
+            return entry
+
+        if server_id in self._stale or time.monotonic() - entry.fetched_at > self.ttl:
+            self._refresh_once(server_id, client)
+        return entry
+
+    def _refresh_once(self, server_id: str, client: Client) -> "asyncio.Task[CatalogEntry]":
+        # Single-flight: concurrent lookups share one in-progress refresh.
+        task = self._refreshing.get(server_id)
+        if task is None or task.done():
+            task = asyncio.create_task(self._refresh(server_id, client))
+            self._refreshing[server_id] = task
+            task.add_done_callback(lambda t: self._on_refresh_done(server_id, t))
+        return task
+
+    def _on_refresh_done(self, server_id: str, task: asyncio.Task):
+        if self._refreshing.get(server_id) is task:
+            del self._refreshing[server_id]
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Failed to refresh tool catalog for {server_id}: {task.exception()}")
+
+    async def _refresh(self, server_id: str, client: Client) -> CatalogEntry:
+        self._stale.discard(server_id)
+        async with self._session_manager.session(server_id, client) as session_client:
+            tools = await session_client.list_tools()
+
+        previous = self._entries.get(server_id)
+        fingerprint = _fingerprint(tools)
+        if previous is not None and previous.fingerprint == fingerprint and previous.client is client:
+            entry = CatalogEntry(previous.tools, previous.langchain_tools, previous.version, fingerprint, time.monotonic(), previous.read_only_tools, client)
+        else:
+            # A new version also when only the client changed, so agents
+            # cached on the old wrappers are rebuilt too.
+            entry = CatalogEntry(
+                tools=tools,
+                langchain_tools=self._build_langchain_tools(server_id, client, tools),
+                version=self._last_version.get(server_id, 0) + 1,
+                fingerprint=fingerprint,
+                fetched_at=time.monotonic(),
+                read_only_tools=_read_only_tools(tools),
+                client=client,
+            )
+            logger.info(f"Tool catalog for {server_id} is now version {entry.version} ({len(tools)} tools)")
+        self._entries[server_id] = entry
+        self._last_version[server_id] = entry.version
+        return entry
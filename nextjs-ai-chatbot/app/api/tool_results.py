@@ -0,0 +1,106 @@
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+ResultKey = Tuple[str, str, str, Hashable]
+
+
+@dataclass
+class _CachedResult:
+    value: Any
+    size: int
+    expires_at: float
+
+
+def canonical_arguments(arguments: Optional[Dict[str, Any]]) -> str:
+    """Serializes tool arguments so equal arguments give equal keys, whatever their order."""
+    return json.dumps(arguments or {}, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ToolResultCache:
+    """
+    Caches results of read-only MCP tool calls, keyed by (server, tool,
+    canonicalized arguments, principal).
+
+    Entries expire after `ttl` seconds, and the least recently used are
+    evicted once there are more than `maxsize` or their estimated size
+    passes `max_bytes`. Any mutating call to a server drops that server's
+    entries. It also bumps the server's generation, so a read that was in
+    flight during the mutation isn't stored afterwards.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0, max_bytes: int = 16 * 1024 * 1024, enabled: bool = True):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._entries: "OrderedDict[ResultKey, _CachedResult]" = OrderedDict()
+        self._by_server: Dict[str, Set[ResultKey]] = {}
+        self._generations: Dict[str, int] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(server_id: str, tool_name: str, arguments: Optional[Dict[str, Any]], principal: Hashable) -> ResultKey:
+        return (server_id, tool_name, canonical_arguments(arguments), principal)
+
+    def generation(self, server_id: str) -> int:
+        return self._generations.get(server_id, 0)
+
+    def _drop(self, key: ResultKey):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+            server_keys = self._by_server.get(key[0])
+            if server_keys is not None:
+                server_keys.discard(key)
+
+    def get(self, key: ResultKey) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def put(self, key: ResultKey, value: Any, size: int, generation: int):
+        """
+        Stores a result unless the server was mutated since `generation` was
+        read, or the result alone is over the size bound.
+        """
+        if generation != self.generation(key[0]) or size > self.max_bytes:
+            return
+        self._drop(key)
+        self._entries[key] = _CachedResult(value, size, time.monotonic() + self.ttl)
+        self._by_server.setdefault(key[0], set()).add(key)
+        self._bytes += size
+        while len(self._entries) > self.maxsize or self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def invalidate_server(self, server_id: str):
+        """Drops every cached result for a server, e.g. after a mutating tool ran on it."""
+        self._generations[server_id] = self.generation(server_id) + 1
+        for key in list(self._by_server.pop(server_id, ())):
+            self._drop(key)
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "maxsize": self.maxsize,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,81 @@
+import asyncio
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# Call the stub server's echo tool once, then answer.
+DEFAULT_SCRIPT = [
+    {"tool": "echo", "args": {"text": "hello"}},
+    {"text": "Done."},
+]
+
+
+class FakeToolCallingChatModel(BaseChatModel):
+    """
+    A deterministic chat model for offline benchmarks of the agent loop.
+
+    Each turn follows `script`: step N of a turn is chosen by how many AI
+    messages follow the last human message, so a script of a tool call then
+    a text answer makes every turn call that tool once and then reply. A step
+    of `{"tools": [...]}` emits several tool calls at once, as a model does
+    for independent calls. Each generation sleeps `latency` seconds to stand
+    in for the real model.
+    """
+    script: List[Dict[str, Any]] = DEFAULT_SCRIPT
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-tool-calling"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeToolCallingChatModel":
+        # The script already names the tools to call.
+        return self
+
+    def _next_message(self, messages: List[BaseMessage]) -> AIMessage:
+        step = 0
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            if isinstance(message, AIMessage):
+                step += 1
+
+        if step >= len(self.script):
+            return AIMessage(content="Done.")
+        action = self.script[step]
+        calls = action.get("tools") or ([action] if "tool" in action else [])
+        if calls:
+            return AIMessage(
+                content="",
+                tool_calls=[{
+                    "name": call["tool"],
+                    "args": call.get("args", {}),
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                } for call in calls],
+            )
+        return AIMessage(content=action.get("text", ""))
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
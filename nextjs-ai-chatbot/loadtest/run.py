@@ -0,0 +1,160 @@
+"""
+Offline load test for the Quart chat backend.
+
+Runs app.api.index in-process with a scripted fake chat model in place of
+Grok and in-process FastMCP stub servers in place of OAuth-protected ones,
+then drives /api/chat/langchain and /api/mcp/servers/<id>/call at a fixed
+concurrency and reports latency percentiles and throughput. No API keys,
+network or Redis are needed. From nextjs-ai-chatbot/:
+
+    python -m loadtest.run --requests 200 --concurrency 20 --model-latency 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List
+
+# index.py builds its Redis client at import time; nothing connects unless --redis is used.
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+
+from fastmcp import Client
+from quart.sessions import SecureCookieSessionInterface
+
+from app.api import index
+from app.api.history import HistoryManager
+from app.api.server_registry import ServerRegistry
+from loadtest.fake_chat_model import DEFAULT_SCRIPT, FakeToolCallingChatModel
+from loadtest.stub_mcp_server import build_stub_server
+
+
+class CookieSessionInterface(SecureCookieSessionInterface):
+    """
+    Quart's cookie sessions in place of Redis ones. Quart-Session's
+    before_serving hook awaits `create()` on whichever interface is set.
+    """
+    async def create(self, app):
+        pass
+
+
+async def register_stub_servers(count: int, latency: float, extra_tools: int) -> List[str]:
+    """Registers `count` stub servers the way a completed OAuth flow would."""
+    server_ids = []
+    for i in range(count):
+        server_id = str(uuid.uuid4())
+        client = Client(
+            build_stub_server(latency=latency, extra_tools=extra_tools, name=f"stub-{i}"),
+            message_handler=index.tool_catalog.message_handler(server_id),
+        )
+        record = {
+            "server_url": f"memory://stub-{i}",
+            "server_name": f"stub-{i}",
+            "authenticated_at": "now",
+        }
+        await index.server_registry.register(server_id, record, client=client)
+        server_ids.append(server_id)
+    return server_ids
+
+
+def summarize(name: str, latencies: List[float], errors: int, wall: float) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    percentiles = statistics.quantiles(ordered, n=100, method="inclusive") if len(ordered) > 1 else ordered * 99
+    return {
+        "scenario": name,
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput_rps": (len(latencies) + errors) / wall if wall else 0.0,
+        "p50_ms": percentiles[49] * 1000 if ordered else 0.0,
+        "p95_ms": percentiles[94] * 1000 if ordered else 0.0,
+        "p99_ms": percentiles[98] * 1000 if ordered else 0.0,
+        "max_ms": ordered[-1] * 1000 if ordered else 0.0,
+    }
+
+
+async def drive(name: str, send: Callable[[], Awaitable[bool]], requests: int, concurrency: int) -> Dict[str, float]:
+    """Runs `requests` calls of `send` with at most `concurrency` in flight."""
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            ok = await send()
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(name, latencies, errors, time.perf_counter() - wall_start)
+
+
+async def run(args) -> List[Dict[str, float]]:
+    script = json.loads(args.script) if args.script else DEFAULT_SCRIPT
+    fake_model = FakeToolCallingChatModel(script=script, latency=args.model_latency)
+    # Seed the process-wide model cache so the chat route uses the fake.
+    index.agent_cache.model(index.XAI_MODEL_KEY, lambda: fake_model)
+
+    if not args.redis:
+        index.app.session_interface = CookieSessionInterface()
+        index.server_registry = ServerRegistry(None, index.make_mcp_client, on_forget=index.forget_server_locally)
+        index.langchain_history = HistoryManager(None, index.summarize_with_grok, **index.HISTORY_SETTINGS)
+
+    server_ids = await register_stub_servers(args.servers, args.tool_latency, args.extra_tools)
+    chat_body = {"messages": [{"role": "user", "content": "Echo hello, please."}]}
+    call_body = {"tool_name": "echo", "arguments": {"text": "hello"}}
+
+    results = []
+    async with index.app.test_app() as test_app:
+        client = test_app.test_client()
+
+        async def chat() -> bool:
+            response = await client.post("/api/chat/langchain", json=chat_body)
+            return response.status_code == 200 and (await response.get_json()).get("success", False)
+
+        async def call() -> bool:
+            response = await client.post(f"/api/mcp/servers/{server_ids[0]}/call", json=call_body)
+            return response.status_code == 200 and (await response.get_json()).get("success", False)
+
+        # One untimed request each, so session setup and tool listing aren't in the numbers.
+        await chat()
+        await call()
+
+        if args.scenario in ("all", "call"):
+            results.append(await drive("tool call", call, args.requests, args.concurrency))
+        if args.scenario in ("all", "chat"):
+            results.append(await drive("langchain chat", chat, args.requests, args.concurrency))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for the chat backend.")
+    parser.add_argument("--scenario", choices=["all", "chat", "call"], default="all")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario.")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--servers", type=int, default=3, help="Stub MCP servers to register.")
+    parser.add_argument("--extra-tools", type=int, default=10, help="No-op tools per stub server.")
+    parser.add_argument("--model-latency", type=float, default=0.0, help="Seconds per fake model generation.")
+    parser.add_argument("--tool-latency", type=float, default=0.0, help="Seconds per stub tool call.")
+    parser.add_argument("--script", help="JSON list of fake model steps, e.g. '[{\"tool\": \"add\", \"args\": {\"a\": 1, \"b\": 2}}, {\"text\": \"3\"}]'.")
+    parser.add_argument("--redis", action="store_true", help="Keep the Redis-backed sessions, server registry and history summaries (needs REDIS_URL).")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    print(f"{'scenario':<16} {'reqs':>6} {'errors':>6} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for r in results:
+        print(
+            f"{r['scenario']:<16} {r['requests']:>6} {r['errors']:>6} {r['throughput_rps']:>9.1f} "
+            f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['max_ms']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
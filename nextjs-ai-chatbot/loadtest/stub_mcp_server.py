@@ -0,0 +1,31 @@
+import asyncio
+
+from fastmcp import FastMCP
+
+
+def build_stub_server(latency: float = 0.0, extra_tools: int = 0, name: str = "Stub MCP Server") -> FastMCP:
+    """
+    Builds an in-process FastMCP server for load tests. `echo` and `add`
+    sleep `latency` seconds to stand in for a downstream API; `extra_tools`
+    adds no-op tools to make the tool list as long as a real server's.
+    """
+    mcp = FastMCP(name=name)
+
+    @mcp.tool
+    async def echo(text: str) -> str:
+        """Returns the given text."""
+        await asyncio.sleep(latency)
+        return text
+
+    @mcp.tool
+    async def add(a: float, b: float) -> float:
+        """Adds two numbers."""
+        await asyncio.sleep(latency)
+        return a + b
+
+    for i in range(extra_tools):
+        async def noop() -> str:
+            return "ok"
+        mcp.tool(noop, name=f"noop_{i}", description=f"No-op tool {i}.")
+
+    return mcp